@@ -4,30 +4,110 @@ Args: event with httpMethod, body, queryStringParameters
 Returns: HTTP response with application data
 '''
 import json
-import os
-from typing import Dict, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from typing import Dict, Any, List, Tuple
 
-def get_db_connection():
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn)
+from shared import counters
+from shared import db
+from shared import export
+from shared import instrumentation
+from shared import outbox
+from shared import query_builder
+from shared import runtime
 
+LIST_FILTERS = {
+    'job_id': query_builder.Filter('ja.job_id = %s', query_builder.integer),
+    'jobseeker_id': query_builder.Filter('ja.jobseeker_id = %s', query_builder.integer)
+}
+EXPORT_FILTERS = {
+    **LIST_FILTERS,
+    'employer_id': query_builder.Filter('j.employer_id = %s', query_builder.integer)
+}
+STATUS_TRANSITIONS = {
+    'pending': ('accepted', 'rejected'),
+    'accepted': ('rejected',),
+    'rejected': ('accepted',)
+}
+TARGET_STATUSES = tuple(sorted({target for targets in STATUS_TRANSITIONS.values() for target in targets}))
+MAX_BULK_TRANSITION = 1000
+DEFAULT_LATEST_APPLICANTS = 5
+MAX_LATEST_APPLICANTS = 20
+
+EMPLOYER_OVERVIEW_QUERY = '''
+    SELECT j.id, j.title, j.status, j.created_at, j.deadline,
+           COALESCE(counts.total, 0) as applications_total,
+           COALESCE(counts.by_status, '{}'::json) as applications_by_status,
+           COALESCE(latest.applicants, '[]'::json) as latest_applications
+    FROM jobs j
+    LEFT JOIN LATERAL (
+        SELECT sum(status_count)::int as total,
+               json_object_agg(status, status_count) as by_status
+        FROM (
+            SELECT ja.status, count(*) as status_count
+            FROM job_applications ja
+            WHERE ja.job_id = j.id
+            GROUP BY ja.status
+        ) per_status
+    ) counts ON true
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'id', recent.id,
+                   'jobseeker_id', recent.jobseeker_id,
+                   'jobseeker_name', u.first_name || ' ' || u.last_name,
+                   'status', recent.status,
+                   'applied_at', recent.applied_at
+               ) ORDER BY recent.applied_at DESC) as applicants
+        FROM (
+            SELECT ja.id, ja.jobseeker_id, ja.status, ja.applied_at
+            FROM job_applications ja
+            WHERE ja.job_id = j.id
+            ORDER BY ja.applied_at DESC
+            LIMIT %s
+        ) recent
+        JOIN users u ON recent.jobseeker_id = u.id
+    ) latest ON true
+    WHERE j.employer_id = %s
+    ORDER BY j.created_at DESC
+'''
+
+TRANSITION_QUERY = f'''
+    WITH requested AS (
+        SELECT DISTINCT unnest(%s::int[]) as id
+    ),
+    current_rows AS (
+        SELECT ja.id, ja.status
+        FROM job_applications ja
+        WHERE ja.id IN (SELECT id FROM requested)
+        FOR UPDATE
+    ),
+    updated AS (
+        UPDATE job_applications ja
+        SET status = %s, updated_at = CURRENT_TIMESTAMP
+        FROM current_rows c
+        WHERE ja.id = c.id AND c.status = ANY(%s)
+        RETURNING ja.id, ja.job_id, ja.jobseeker_id, ja.status, c.status as previous_status
+    ),
+    outboxed AS (
+        INSERT INTO application_outbox (application_id, job_id, jobseeker_id, event_type, payload)
+        SELECT u.id, u.job_id, u.jobseeker_id, '{outbox.STATUS_CHANGED}',
+               json_build_object('from', u.previous_status, 'to', u.status)
+        FROM updated u
+    )
+    SELECT r.id, c.status as current_status, u.id IS NOT NULL as changed
+    FROM requested r
+    LEFT JOIN current_rows c ON c.id = r.id
+    LEFT JOIN updated u ON u.id = r.id
+    ORDER BY r.id
+'''
+
+PREFLIGHT = runtime.preflight('GET, POST, PUT, OPTIONS', 'Content-Type, X-User-Id, X-Read-Primary')
+APPLICATION_NOT_FOUND = runtime.error(404, 'Application not found')
+
+@instrumentation.instrument('applications')
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return runtime.static(PREFLIGHT)
     
     try:
         if method == 'GET':
@@ -37,28 +117,45 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif method == 'PUT':
             return update_application(event)
         else:
-            return {
-                'statusCode': 405,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Method not allowed'}),
-                'isBase64Encoded': False
-            }
+            return runtime.static(runtime.METHOD_NOT_ALLOWED)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
+        return runtime.error(500, str(e))
 
 def get_applications(event: Dict[str, Any]) -> Dict[str, Any]:
     params = event.get('queryStringParameters') or {}
-    job_id = params.get('job_id')
-    jobseeker_id = params.get('jobseeker_id')
     
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    if params.get('export'):
+        return export_applications(event, params)
+    
+    if params.get('employer_id'):
+        return get_employer_overview(event, params)
+    
+    try:
+        query, query_params = build_list_query(params)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        cursor = runtime.dict_cursor(conn)
+        query_builder.execute(cursor, query, query_params)
+        applications = cursor.fetchall()
+        cursor.close()
+    
+    return runtime.json_response(200, applications)
+
+def export_applications(event: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        fmt = export.parse_format(params['export'])
+        query, query_params = build_list_query(params, EXPORT_FILTERS)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        result = export.export(conn, query, query_params, fmt, 'applications')
     
+    return runtime.response(200, json.dumps(result))
+
+def build_list_query(params: Dict[str, Any], filters: Dict[str, query_builder.Filter] = LIST_FILTERS) -> Tuple[str, List[Any]]:
     query = '''
         SELECT ja.*, 
                j.title as job_title,
@@ -77,28 +174,29 @@ def get_applications(event: Dict[str, Any]) -> Dict[str, Any]:
         WHERE 1=1
     '''
     
-    conditions = []
-    if job_id:
-        conditions.append(f"ja.job_id = {job_id}")
-    if jobseeker_id:
-        conditions.append(f"ja.jobseeker_id = {jobseeker_id}")
-    
+    conditions, query_params = query_builder.build_conditions(params, filters)
     if conditions:
         query += ' AND ' + ' AND '.join(conditions)
     
     query += ' ORDER BY ja.applied_at DESC'
     
-    cursor.execute(query)
-    applications = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps([dict(app) for app in applications], default=str),
-        'isBase64Encoded': False
-    }
+    return query, query_params
+
+def get_employer_overview(event: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        employer_id = int(params['employer_id'])
+        latest = int(params.get('latest') or DEFAULT_LATEST_APPLICANTS)
+    except ValueError:
+        return runtime.error(400, 'employer_id and latest must be integers')
+    latest = max(0, min(latest, MAX_LATEST_APPLICANTS))
+    
+    with db.read_connection(event) as conn:
+        cursor = runtime.dict_cursor(conn)
+        query_builder.execute(cursor, EMPLOYER_OVERVIEW_QUERY, (latest, employer_id))
+        jobs = cursor.fetchall()
+        cursor.close()
+    
+    return runtime.json_response(200, jobs)
 
 def create_application(event: Dict[str, Any]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
@@ -106,106 +204,116 @@ def create_application(event: Dict[str, Any]) -> Dict[str, Any]:
     required_fields = ['job_id', 'jobseeker_id']
     for field in required_fields:
         if field not in body_data:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': f'Missing required field: {field}'}),
-                'isBase64Encoded': False
-            }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('''
-        SELECT id FROM job_applications 
-        WHERE job_id = %s AND jobseeker_id = %s
-    ''', (body_data['job_id'], body_data['jobseeker_id']))
-    
-    existing = cursor.fetchone()
-    if existing:
+            return runtime.error(400, f'Missing required field: {field}')
+    
+    with db.connection() as conn:
+        cursor = runtime.dict_cursor(conn)
+        cursor.execute('''
+            WITH inserted AS (
+                INSERT INTO job_applications (
+                    job_id, jobseeker_id, cover_letter, resume_url
+                ) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (job_id, jobseeker_id) DO NOTHING
+                RETURNING *
+            ),
+            counted AS (
+                INSERT INTO job_application_counter_shards (job_id, shard, delta)
+                SELECT job_id, %s, 1 FROM inserted
+                ON CONFLICT (job_id, shard) DO UPDATE
+                    SET delta = job_application_counter_shards.delta + 1
+            )
+            SELECT * FROM inserted
+        ''', (
+            body_data['job_id'],
+            body_data['jobseeker_id'],
+            body_data.get('cover_letter'),
+            body_data.get('resume_url'),
+            counters.pick_shard()
+        ))
+        
+        application = cursor.fetchone()
+        conn.commit()
         cursor.close()
-        conn.close()
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Already applied to this job'}),
-            'isBase64Encoded': False
-        }
-    
-    cursor.execute('''
-        INSERT INTO job_applications (
-            job_id, jobseeker_id, cover_letter, resume_url
-        ) VALUES (%s, %s, %s, %s)
-        RETURNING *
-    ''', (
-        body_data['job_id'],
-        body_data['jobseeker_id'],
-        body_data.get('cover_letter'),
-        body_data.get('resume_url')
-    ))
-    
-    application = cursor.fetchone()
-    
-    cursor.execute('''
-        UPDATE jobs 
-        SET applications_count = applications_count + 1 
-        WHERE id = %s
-    ''', (body_data['job_id'],))
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    return {
-        'statusCode': 201,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(dict(application), default=str),
-        'isBase64Encoded': False
-    }
+    
+    if not application:
+        return runtime.error(400, 'Already applied to this job')
+    
+    return runtime.json_response(201, application)
 
 def update_application(event: Dict[str, Any]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
+    
+    if 'ids' in body_data:
+        return bulk_update_status(body_data)
+    
     application_id = body_data.get('id')
     
     if not application_id:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Missing application id'}),
-            'isBase64Encoded': False
-        }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    update_fields = []
-    values = []
-    
-    if 'status' in body_data:
-        update_fields.append('status = %s')
-        values.append(body_data['status'])
-    
-    if not update_fields:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'No fields to update'}),
-            'isBase64Encoded': False
-        }
-    
-    values.append(application_id)
-    query = f"UPDATE job_applications SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = %s RETURNING *"
-    
-    cursor.execute(query, values)
-    application = cursor.fetchone()
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(dict(application) if application else {}, default=str),
-        'isBase64Encoded': False
-    }
+        return runtime.error(400, 'Missing application id')
+    
+    if 'status' not in body_data:
+        return runtime.error(400, 'No fields to update')
+    
+    try:
+        status = parse_status(body_data['status'])
+        application_id = query_builder.integer(application_id)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    result = transition_statuses([application_id], status)
+    
+    if result['missing']:
+        return runtime.static(APPLICATION_NOT_FOUND)
+    
+    if result['invalid']:
+        current_status = result['invalid'][0]['status']
+        return runtime.error(409, f'Cannot change status from {current_status} to {status}', status=current_status)
+    
+    return runtime.response(200, json.dumps({'id': application_id, 'status': status, 'changed': bool(result['updated'])}))
+
+def bulk_update_status(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        status = parse_status(body_data.get('status'))
+        raw_ids = body_data['ids']
+        if not isinstance(raw_ids, list) or not raw_ids:
+            raise ValueError('ids must be a non-empty list')
+        if len(raw_ids) > MAX_BULK_TRANSITION:
+            raise ValueError(f'Too many ids: {len(raw_ids)} (max {MAX_BULK_TRANSITION})')
+        application_ids = [query_builder.integer(raw_id) for raw_id in raw_ids]
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    result = transition_statuses(application_ids, status)
+    
+    return runtime.response(200, json.dumps({'status': status, **result}))
+
+def parse_status(raw: Any) -> str:
+    if raw not in TARGET_STATUSES:
+        raise ValueError(f"Invalid status: {raw} (expected one of {', '.join(TARGET_STATUSES)})")
+    return raw
+
+def transition_statuses(application_ids: List[int], status: str) -> Dict[str, Any]:
+    '''
+    Move every application whose current status allows it to status in one statement, with
+    one outbox event per change. Applications already in status are reported as unchanged.
+    '''
+    allowed_from = [source for source, targets in STATUS_TRANSITIONS.items() if status in targets]
+    
+    with db.connection() as conn:
+        cursor = runtime.dict_cursor(conn)
+        cursor.execute(TRANSITION_QUERY, (application_ids, status, allowed_from))
+        rows = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+    
+    result: Dict[str, Any] = {'updated': [], 'unchanged': [], 'invalid': [], 'missing': []}
+    for row in rows:
+        if row['changed']:
+            result['updated'].append(row['id'])
+        elif row['current_status'] is None:
+            result['missing'].append(row['id'])
+        elif row['current_status'] == status:
+            result['unchanged'].append(row['id'])
+        else:
+            result['invalid'].append({'id': row['id'], 'status': row['current_status']})
+    return result
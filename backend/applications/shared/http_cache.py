@@ -0,0 +1,54 @@
+'''
+Business: Conditional GET support - strong ETags, If-None-Match handling and per-endpoint Cache-Control
+Args: event headers, response body or row validators (id, updated_at, counters, reference version)
+Returns: response headers carrying validators, or a 304 response with an empty body
+'''
+import hashlib
+from typing import Any, Dict, Optional
+
+REFERENCES_CACHE_CONTROL = 'public, max-age=60, stale-while-revalidate=600'
+JOB_CACHE_CONTROL = 'public, no-cache'
+USER_CACHE_CONTROL = 'private, no-cache'
+NO_STORE = 'no-store'
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    headers = event.get('headers') or {}
+    value = headers.get(name)
+    if value is not None:
+        return value
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+def body_etag(body: str) -> str:
+    return '"' + hashlib.blake2b(body.encode('utf-8'), digest_size=16).hexdigest() + '"'
+
+def validator_etag(*parts: Any) -> str:
+    '''
+    ETag for a row-level resource derived from the values that change whenever its
+    representation changes, so a revalidation can be answered without building the body.
+    '''
+    raw = '|'.join(part.isoformat() if hasattr(part, 'isoformat') else str(part) for part in parts)
+    return body_etag(raw)
+
+def is_not_modified(event: Dict[str, Any], etag: str) -> bool:
+    if_none_match = get_header(event, 'If-None-Match')
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {'ETag': etag, 'Cache-Control': cache_control}
+
+def not_modified_response(etag: str, cache_control: str) -> Dict[str, Any]:
+    return {
+        'statusCode': 304,
+        'headers': {'Access-Control-Allow-Origin': '*', **cache_headers(etag, cache_control)},
+        'body': '',
+        'isBase64Encoded': False
+    }
@@ -0,0 +1,50 @@
+'''
+Business: Slim runtime shared by the handlers - constant headers, response builders and precomputed static responses
+Args: status code with a body, data or error message; allowed methods and headers for a CORS preflight
+Returns: response dicts in the cloud function format; dict cursors with psycopg2 imported on first use
+'''
+import json
+from typing import Any, Dict, Optional
+
+from shared import serializer
+
+CORS_MAX_AGE = '86400'
+JSON_HEADERS = {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
+def response(status_code: int, body: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    '''headers default to the shared JSON_HEADERS dict; pass a new dict to add headers, never mutate it.'''
+    return {
+        'statusCode': status_code,
+        'headers': JSON_HEADERS if headers is None else headers,
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+def json_response(status_code: int, data: Any, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    return response(status_code, serializer.dumps(data), headers)
+
+def error(status_code: int, message: str, **extra: Any) -> Dict[str, Any]:
+    return response(status_code, json.dumps({'error': message, **extra}))
+
+def preflight(methods: str, allow_headers: str) -> Dict[str, Any]:
+    return response(200, '', {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': methods,
+        'Access-Control-Allow-Headers': allow_headers,
+        'Access-Control-Max-Age': CORS_MAX_AGE
+    })
+
+def static(prebuilt: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Responses built once at import time (preflights, fixed errors) are returned as shallow
+    copies: the instrumentation wrapper replaces response['headers'] on the returned dict.
+    '''
+    return dict(prebuilt)
+
+METHOD_NOT_ALLOWED = error(405, 'Method not allowed')
+
+def dict_cursor(conn: Any) -> Any:
+    '''RealDictCursor on conn; psycopg2.extras is imported on the first query, not at cold start.'''
+    from psycopg2.extras import RealDictCursor
+
+    return conn.cursor(cursor_factory=RealDictCursor)
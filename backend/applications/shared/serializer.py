@@ -0,0 +1,45 @@
+'''
+Business: JSON serialization of query results shared by all handlers
+Args: rows straight from RealDictCursor (no dict() copies), nested lists and dicts
+Returns: JSON text - via orjson when it is installed, stdlib json otherwise
+'''
+import json
+from typing import Any
+
+from shared import instrumentation
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _fallback(value: Any) -> str:
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+if orjson is not None:
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_fallback).decode('utf-8')
+else:
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, default=_fallback)
+
+if instrumentation.ENABLED:
+    _untimed_dumps = dumps
+
+    def dumps(obj: Any) -> str:
+        with instrumentation.span('serialize'):
+            return _untimed_dumps(obj)
+
+def register_numeric_as_text(conn: Any) -> None:
+    '''
+    Return NUMERIC columns as their PostgreSQL text form instead of Decimal. The wire format
+    stays the same as the old default=str output, and no Decimal objects are built per row.
+    '''
+    import psycopg2.extensions
+
+    numeric_as_text = psycopg2.extensions.new_type(
+        psycopg2.extensions.DECIMAL.values, 'NUMERIC_AS_TEXT', lambda value, cursor: value
+    )
+    psycopg2.extensions.register_type(numeric_as_text, conn)
@@ -0,0 +1,70 @@
+'''
+Business: Helpers shared by the backend benchmark scripts
+Args: DATABASE_URL of a disposable local PostgreSQL database
+Returns: loaded handler modules, connections and EXPLAIN plan utilities
+'''
+import importlib.util
+import json
+import math
+import os
+import sys
+from types import ModuleType
+from typing import Any, Dict, Iterator, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'db_migrations')
+FUNCTIONS = ('jobs', 'users', 'applications', 'references', 'maintenance', 'matching')
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def load_function(name: str) -> ModuleType:
+    '''Import backend/<name>/index.py under a unique module name (every function file is called index).'''
+    path = os.path.join(BACKEND_DIR, name, 'index.py')
+    spec = importlib.util.spec_from_file_location(f'{name}_index', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def connect() -> Any:
+    import psycopg2
+
+    dsn = os.environ.get('DATABASE_URL')
+    if not dsn:
+        sys.exit('DATABASE_URL must point at a disposable PostgreSQL database')
+    return psycopg2.connect(dsn)
+
+def apply_migration(cursor: Any, filename: str) -> None:
+    '''Run a db_migrations script against the cursor's current search_path (the seeded bench schema).'''
+    with open(os.path.join(MIGRATIONS_DIR, filename), encoding='utf-8') as migration:
+        cursor.execute(migration.read())
+
+def explain(cursor: Any, query: str, params: List[Any]) -> Dict[str, Any]:
+    cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + query, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+def walk_plan(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk_plan(child)
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    '''Nearest-rank percentiles over per-request latencies in milliseconds.'''
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {}
+    def rank(q: float) -> float:
+        return round(ordered[max(0, math.ceil(q * len(ordered)) - 1)], 3)
+    return {
+        'p50_ms': rank(0.50),
+        'p95_ms': rank(0.95),
+        'p99_ms': rank(0.99),
+        'max_ms': round(ordered[-1], 3),
+        'mean_ms': round(sum(ordered) / len(ordered), 3)
+    }
+
+def emit(result: Dict[str, Any]) -> None:
+    print(json.dumps(result, indent=2, default=str))
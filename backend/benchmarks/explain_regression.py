@@ -0,0 +1,86 @@
+'''
+Business: EXPLAIN regression check - fail when a handler listing query falls back to a sequential scan
+Args: DATABASE_URL (disposable database), --jobs, --users, --applications, --keep
+Returns: JSON report of scanned relations per query shape; exit status 1 on any guarded Seq Scan
+'''
+import argparse
+import sys
+from typing import Any, Dict, List, Tuple
+
+from common import connect, emit, explain, load_function, walk_plan
+from seed import create_schema, populate
+
+SCHEMA = 'bench_explain'
+GUARDED_TABLES = ('jobs', 'job_search', 'job_applications', 'users')
+
+def query_shapes() -> List[Tuple[str, str, List[Any]]]:
+    jobs_function = load_function('jobs')
+    users_function = load_function('users')
+    applications_function = load_function('applications')
+
+    shapes = []
+    for name, params in (
+        ('jobs_latest', {}),
+        ('jobs_by_category', {'category_id': '5'}),
+        ('jobs_by_employer', {'employer_id': '70'}),
+        ('jobs_skills_any', {'skills': '1,14,27'}),
+        ('jobs_skills_all', {'skills': '1,14', 'skills_match': 'all'}),
+        ('jobs_search', {'search': 'job 4242'})
+    ):
+        query, query_params, _ = jobs_function.build_list_query(params, 20)
+        shapes.append((name, query, query_params))
+    for name, params in (
+        ('users_latest', {}),
+        ('users_by_role', {'role': 'employer'}),
+        ('users_skills_any', {'skills': '3,20'})
+    ):
+        query, query_params = users_function.build_list_query(params, ['id', 'first_name', 'last_name'], 20)
+        shapes.append((name, query, query_params))
+    for name, params in (
+        ('applications_by_job', {'job_id': '42'}),
+        ('applications_by_jobseeker', {'jobseeker_id': '42'})
+    ):
+        query, query_params = applications_function.build_list_query(params)
+        shapes.append((name, query, query_params))
+    shapes.append(('employer_overview', applications_function.EMPLOYER_OVERVIEW_QUERY, [5, 70]))
+    return shapes
+
+def check(cursor: Any, query: str, params: List[Any]) -> Dict[str, Any]:
+    plan = explain(cursor, query, params)
+    scans = sorted({
+        f"{node['Node Type']} on {node['Relation Name']}"
+        for node in walk_plan(plan['Plan']) if 'Relation Name' in node
+    })
+    seq_scans = sorted({
+        node['Relation Name'] for node in walk_plan(plan['Plan'])
+        if node['Node Type'] == 'Seq Scan' and node['Relation Name'] in GUARDED_TABLES
+    })
+    return {'execution_ms': round(plan['Execution Time'], 3), 'scans': scans, 'seq_scans': seq_scans}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--applications', type=int, default=200000)
+    parser.add_argument('--keep', action='store_true', help='keep the seeded schema for manual inspection')
+    args = parser.parse_args()
+
+    conn = connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    create_schema(cursor, SCHEMA)
+    populate(cursor, args.jobs, args.users, args.applications)
+
+    report = {name: check(cursor, query, params) for name, query, params in query_shapes()}
+    failures = [name for name, result in report.items() if result['seq_scans']]
+
+    if not args.keep:
+        cursor.execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+    cursor.close()
+    conn.close()
+    emit({'dataset': vars(args), 'queries': report, 'failures': failures})
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
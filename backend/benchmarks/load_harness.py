@@ -0,0 +1,153 @@
+'''
+Business: Load harness - seed a realistic dataset and drive handler(event, context) from concurrent workers
+Args: DATABASE_URL (disposable database), --jobs, --users, --applications, --workers, --requests, --routes, --reuse, --keep, --output
+Returns: JSON report with throughput, p50/p95/p99 latency and status codes per route
+'''
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from common import connect, emit, latency_summary, load_function
+from seed import REFERENCE_ROWS, create_schema, populate
+
+SCHEMA = 'bench_load'
+
+EventFactory = Callable[[random.Random], Dict[str, Any]]
+
+def get_event(params: Dict[str, str]) -> Dict[str, Any]:
+    return {'httpMethod': 'GET', 'queryStringParameters': params, 'headers': {}}
+
+def route_table(jobs: int, users: int) -> Dict[str, Tuple[str, EventFactory]]:
+    '''Route name -> (function name, event factory). Ids are drawn from the seeded ranges.'''
+    def jobs_list(rng: random.Random) -> Dict[str, Any]:
+        params = rng.choice([
+            {},
+            {'category_id': str(rng.randint(1, REFERENCE_ROWS))},
+            {'city_id': str(rng.randint(1, REFERENCE_ROWS)), 'remote_only': 'true'},
+            {'skills': f'{rng.randint(1, REFERENCE_ROWS)},{rng.randint(1, REFERENCE_ROWS)}'},
+            {'search': f'job {rng.randint(1, jobs)}'}
+        ])
+        return get_event(params)
+
+    def jobs_detail(rng: random.Random) -> Dict[str, Any]:
+        return get_event({'id': str(rng.randint(1, jobs))})
+
+    def users_search(rng: random.Random) -> Dict[str, Any]:
+        return get_event({
+            'role': 'jobseeker',
+            'skills': str(rng.randint(1, REFERENCE_ROWS)),
+            'fields': 'id,first_name,last_name,current_position,city_name'
+        })
+
+    def references(rng: random.Random) -> Dict[str, Any]:
+        return get_event({'type': rng.choice(['all', 'categories', 'cities', 'skills'])})
+
+    def matching_job(rng: random.Random) -> Dict[str, Any]:
+        return get_event({'job_id': str(rng.randint(1, jobs))})
+
+    def matching_user(rng: random.Random) -> Dict[str, Any]:
+        return get_event({'user_id': str(rng.randint(1, users))})
+
+    def applications_create(rng: random.Random) -> Dict[str, Any]:
+        body = {'job_id': rng.randint(1, jobs), 'jobseeker_id': rng.randint(1, users), 'cover_letter': 'Load test'}
+        return {'httpMethod': 'POST', 'body': json.dumps(body), 'headers': {}}
+
+    return {
+        'jobs_list': ('jobs', jobs_list),
+        'jobs_detail': ('jobs', jobs_detail),
+        'users_search': ('users', users_search),
+        'references': ('references', references),
+        'matching_job': ('matching', matching_job),
+        'matching_user': ('matching', matching_user),
+        'applications_create': ('applications', applications_create)
+    }
+
+def run_route(handler: Callable[..., Dict[str, Any]], factory: EventFactory,
+              requests: int, workers: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    events = [factory(rng) for _ in range(requests)]
+
+    def invoke(event: Dict[str, Any]) -> Tuple[float, int]:
+        started = time.perf_counter()
+        response = handler(event, None)
+        return (time.perf_counter() - started) * 1000, response['statusCode']
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(invoke, events))
+    elapsed = time.perf_counter() - started
+
+    statuses: Dict[str, int] = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': requests,
+        'throughput_rps': round(requests / elapsed, 1),
+        **latency_summary([latency for latency, _ in results]),
+        'status_codes': statuses
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=500000)
+    parser.add_argument('--applications', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help='requests per route')
+    parser.add_argument('--routes', default='', help='comma separated subset of routes (default: all)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--reuse', action='store_true', help='reuse an already seeded schema')
+    parser.add_argument('--keep', action='store_true', help='keep the seeded schema for later --reuse runs')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    routes = route_table(args.jobs, args.users)
+    selected = [name.strip() for name in args.routes.split(',') if name.strip()] or list(routes)
+    unknown = [name for name in selected if name not in routes]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    conn = connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    if not args.reuse:
+        create_schema(cursor, SCHEMA)
+        populate(cursor, args.jobs, args.users, args.applications)
+
+    # Handlers connect through DATABASE_URL; libpq applies PGOPTIONS to every new connection
+    os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA}'
+    os.environ['DB_POOL_MAX_SIZE'] = str(args.workers)
+    functions = {name: load_function(name) for name in {routes[route][0] for route in selected}}
+
+    report: Dict[str, Any] = {
+        'dataset': {'jobs': args.jobs, 'users': args.users, 'applications': args.applications},
+        'workers': args.workers,
+        'routes': {}
+    }
+    for index, name in enumerate(selected):
+        function_name, factory = routes[name]
+        handler = functions[function_name].handler
+        handler(factory(random.Random(args.seed)), None)
+        report['routes'][name] = run_route(handler, factory, args.requests, args.workers, args.seed + index)
+
+    db = functions[routes[selected[0]][0]].db
+    report['pool'] = db.pool_stats()
+    report['replicas'] = db.replica_stats()
+    db.get_pool().close_all()
+
+    if not args.keep:
+        cursor.execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+    cursor.close()
+    conn.close()
+
+    emit(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, default=str)
+
+if __name__ == '__main__':
+    main()
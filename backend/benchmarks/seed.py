@@ -0,0 +1,147 @@
+'''
+Business: Synthetic marketplace dataset for benchmarks - the tables the handlers query plus the real migrations
+Args: cursor with autocommit, throwaway schema name, row volumes
+Returns: nothing; leaves the schema first on the cursor's search_path
+'''
+from typing import Any
+
+from common import apply_migration
+
+REFERENCE_ROWS = 200
+SKILLS_PER_ROW = 5
+MIGRATIONS = (
+    'V0002__jobs_search_vector.sql',
+    'V0003__reference_data_version.sql',
+    'V0004__skill_links_unique.sql',
+    'V0005__application_counters.sql',
+    'V0006__job_view_events.sql',
+    'V0007__job_search_projection.sql',
+    'V0008__query_shape_indexes.sql',
+    'V0009__matching_profiles.sql',
+    'V0010__application_outbox.sql'
+)
+
+def create_schema(cursor: Any, schema: str) -> None:
+    '''Base tables in the shape the handlers expect (V0001 does not match them), then V0002+.'''
+    cursor.execute(f'DROP SCHEMA IF EXISTS {schema} CASCADE')
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'SET search_path TO {schema}')
+    for table in ('categories', 'industries'):
+        cursor.execute(f'CREATE TABLE {table} (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL, active BOOLEAN DEFAULT true)')
+    cursor.execute('CREATE TABLE countries (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL)')
+    cursor.execute('CREATE TABLE cities (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL, country_id INTEGER)')
+    cursor.execute('CREATE TABLE skills (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL)')
+    cursor.execute('CREATE TABLE education_levels (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL)')
+    cursor.execute('''
+        CREATE TABLE companies (
+            id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL,
+            industry_id INTEGER, city_id INTEGER, description TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255),
+            role VARCHAR(50) NOT NULL,
+            first_name VARCHAR(100), last_name VARCHAR(100),
+            phone VARCHAR(50), bio TEXT, experience_years INTEGER,
+            current_position VARCHAR(255), resume_url TEXT,
+            city_id INTEGER, country_id INTEGER, education_level_id INTEGER, company_id INTEGER,
+            active BOOLEAN DEFAULT true,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE jobs (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(500) NOT NULL,
+            description TEXT NOT NULL,
+            requirements TEXT, responsibilities TEXT,
+            salary_min NUMERIC(12, 2), salary_max NUMERIC(12, 2), salary_currency VARCHAR(10) DEFAULT 'RUB',
+            employment_type VARCHAR(50), experience_required VARCHAR(50),
+            category_id INTEGER, industry_id INTEGER, company_id INTEGER,
+            employer_id INTEGER, city_id INTEGER, country_id INTEGER,
+            remote_allowed BOOLEAN DEFAULT false,
+            deadline DATE,
+            status VARCHAR(50) DEFAULT 'active',
+            applications_count INTEGER DEFAULT 0,
+            views_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE TABLE job_skills (job_id INTEGER NOT NULL, skill_id INTEGER NOT NULL, required BOOLEAN DEFAULT true)')
+    cursor.execute('CREATE TABLE user_skills (user_id INTEGER NOT NULL, skill_id INTEGER NOT NULL, proficiency_level VARCHAR(50))')
+    cursor.execute('''
+        CREATE TABLE job_applications (
+            id SERIAL PRIMARY KEY,
+            job_id INTEGER NOT NULL, jobseeker_id INTEGER NOT NULL,
+            status VARCHAR(50) DEFAULT 'pending',
+            cover_letter TEXT, resume_url TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    for migration in MIGRATIONS:
+        apply_migration(cursor, migration)
+
+def populate(cursor: Any, jobs: int, users: int, applications: int) -> None:
+    '''
+    Every 10th user is an employer and every 50th is inactive; every 5th job is closed.
+    Applications pair jobs and users pseudo-randomly, duplicates skipped by the unique index.
+    '''
+    for table in ('categories', 'industries', 'countries', 'skills', 'education_levels'):
+        cursor.execute(f"INSERT INTO {table} (name) SELECT '{table} ' || g FROM generate_series(1, %s) g", (REFERENCE_ROWS,))
+    cursor.execute('''
+        INSERT INTO cities (name, country_id)
+        SELECT 'cities ' || g, g %% %s + 1 FROM generate_series(1, %s) g
+    ''', (REFERENCE_ROWS, REFERENCE_ROWS))
+    cursor.execute('''
+        INSERT INTO companies (name, industry_id, city_id)
+        SELECT 'companies ' || g, g %% %s + 1, g %% %s + 1 FROM generate_series(1, %s) g
+    ''', (REFERENCE_ROWS, REFERENCE_ROWS, REFERENCE_ROWS))
+    cursor.execute('''
+        INSERT INTO users (email, role, first_name, last_name, current_position, experience_years,
+                           city_id, country_id, education_level_id, active, created_at)
+        SELECT 'user' || g || '@example.com', CASE WHEN g %% 10 = 0 THEN 'employer' ELSE 'jobseeker' END,
+               'User', g::text, 'Position ' || g %% 300, g %% 25,
+               g %% %s + 1, g %% %s + 1, g %% %s + 1, g %% 50 <> 0, now() - g * interval '1 minute'
+        FROM generate_series(1, %s) g
+    ''', (REFERENCE_ROWS, REFERENCE_ROWS, REFERENCE_ROWS, users))
+    cursor.execute('''
+        INSERT INTO jobs (title, description, salary_min, salary_max, employment_type, experience_required,
+                          category_id, industry_id, company_id, city_id, country_id, employer_id,
+                          remote_allowed, status, created_at)
+        SELECT 'Job ' || g, 'Description of job ' || g, 50000 + g %% 100 * 1000, 100000 + g %% 100 * 2000,
+               (ARRAY['full_time', 'part_time', 'contract'])[g %% 3 + 1],
+               (ARRAY['no_experience', 'junior', 'middle', 'senior'])[g %% 4 + 1],
+               g %% %s + 1, g %% %s + 1, g %% %s + 1, g %% %s + 1, g %% %s + 1,
+               (g %% %s + 1) * 10, g %% 4 = 0,
+               CASE WHEN g %% 5 = 0 THEN 'closed' ELSE 'active' END,
+               now() - g * interval '1 minute'
+        FROM generate_series(1, %s) g
+    ''', (REFERENCE_ROWS, REFERENCE_ROWS, REFERENCE_ROWS, REFERENCE_ROWS, REFERENCE_ROWS,
+          max(users // 10, 1), jobs))
+    cursor.execute('''
+        INSERT INTO job_skills (job_id, skill_id, required)
+        SELECT j, (j * 7 + k * 13) %% %s + 1, k < 3
+        FROM generate_series(1, %s) j, generate_series(0, %s) k
+        ON CONFLICT DO NOTHING
+    ''', (REFERENCE_ROWS, jobs, SKILLS_PER_ROW - 1))
+    cursor.execute('''
+        INSERT INTO user_skills (user_id, skill_id, proficiency_level)
+        SELECT u, (u * 11 + k * 17) %% %s + 1, (ARRAY['junior', 'middle', 'senior'])[k %% 3 + 1]
+        FROM generate_series(1, %s) u, generate_series(0, %s) k
+        ON CONFLICT DO NOTHING
+    ''', (REFERENCE_ROWS, users, SKILLS_PER_ROW - 1))
+    # Row g applies to job g % jobs; the applicant steps by one user per pass over the jobs
+    # (g / jobs), so (job_id, jobseeker_id) stays unique for up to jobs * users applications
+    cursor.execute('''
+        INSERT INTO job_applications (job_id, jobseeker_id, applied_at)
+        SELECT g %% %s + 1, (g / %s + (g %% %s) * 7919::bigint) %% %s + 1, now() - g * interval '1 second'
+        FROM generate_series(1, %s) g
+        ON CONFLICT DO NOTHING
+    ''', (jobs, jobs, jobs, users, applications))
+    cursor.execute('ANALYZE')
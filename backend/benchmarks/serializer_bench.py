@@ -0,0 +1,83 @@
+'''
+Business: Micro-benchmark of the shared serializer against the old dict(row) + json.dumps(default=str) path
+Args: --rows (rows per response), --iterations
+Returns: JSON report with per-response timings for both paths and the speed-up
+'''
+import argparse
+import datetime
+import json
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from common import emit
+from shared import serializer
+
+try:
+    from psycopg2.extras import RealDictRow
+except ImportError:
+    RealDictRow = None
+
+def make_rows(count: int, numeric_as_text: bool) -> List[Any]:
+    now = datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)
+    rows = []
+    for i in range(count):
+        salary_min = '120000.00' if numeric_as_text else Decimal('120000.00')
+        salary_max = '180000.00' if numeric_as_text else Decimal('180000.00')
+        values = {
+            'id': i,
+            'title': f'Senior Python developer {i}',
+            'description': 'Разработка backend-сервисов на Python и PostgreSQL. ' * 8,
+            'salary_min': salary_min,
+            'salary_max': salary_max,
+            'salary_currency': 'RUB',
+            'employment_type': 'full_time',
+            'remote_allowed': bool(i % 2),
+            'views_count': i * 3,
+            'applications_count': i,
+            'created_at': now - datetime.timedelta(minutes=i),
+            'updated_at': now,
+            'deadline': None,
+            'category_name': 'Разработка сайтов',
+            'company_name': 'TechCorp',
+            'city_name': 'Москва',
+            'employer_name': 'Иван Петров'
+        }
+        if RealDictRow is not None:
+            row = RealDictRow()
+            row.update(values)
+        else:
+            row = values
+        rows.append(row)
+    return rows
+
+def time_path(encode: Callable[[List[Any]], str], rows: List[Any], iterations: int) -> Dict[str, Any]:
+    encode(rows)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = encode(rows)
+    elapsed = time.perf_counter() - started
+    return {'us_per_response': round(elapsed / iterations * 1e6, 2), 'body_bytes': len(body)}
+
+def legacy_encode(rows: List[Any]) -> str:
+    return json.dumps([dict(row) for row in rows], default=str)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy = time_path(legacy_encode, make_rows(args.rows, numeric_as_text=False), args.iterations)
+    shared = time_path(serializer.dumps, make_rows(args.rows, numeric_as_text=True), args.iterations)
+    emit({
+        'rows': args.rows,
+        'iterations': args.iterations,
+        'native_encoder': serializer.orjson is not None,
+        'legacy_dict_json_default_str': legacy,
+        'shared_serializer': shared,
+        'speedup': round(legacy['us_per_response'] / shared['us_per_response'], 2)
+    })
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+'''
+Business: Requests-per-second benchmark of the local server - seeded database, keep-alive HTTP clients, 1..N workers
+Args: DATABASE_URL (disposable database), --workers 1,2,4, --threads, --connections, --client-processes, --duration, --warmup, --routes, --reuse, --keep, --output
+Returns: JSON report with total and per-route throughput, latency percentiles and status codes per worker count
+'''
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlencode
+
+from common import BACKEND_DIR, connect, emit, latency_summary
+from load_harness import route_table
+from seed import create_schema, populate
+
+SCHEMA = 'bench_server'
+SERVER_SCRIPT = os.path.join(BACKEND_DIR, 'server', 'app.py')
+
+Samples = Dict[str, Tuple[List[float], Dict[str, int]]]
+
+def encode_request(function: str, event: Dict[str, Any]) -> bytes:
+    query = urlencode(event.get('queryStringParameters') or {})
+    body = (event.get('body') or '').encode('utf-8')
+    head = [
+        f"{event['httpMethod']} /{function}/{'?' + query if query else ''} HTTP/1.1",
+        'Host: bench',
+        f'Content-Length: {len(body)}'
+    ]
+    if body:
+        head.append('Content-Type: application/json')
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+    status = int(head.split(' ', 2)[1])
+    length = 0
+    for line in head.split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+async def drive_connections(port: int, routes: Dict[str, Tuple[str, Any]], connections: int,
+                            duration: float, seed: int) -> Samples:
+    samples: Samples = {name: ([], {}) for name in routes}
+    names = list(routes)
+    deadline = time.perf_counter() + duration
+
+    async def client(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while time.perf_counter() < deadline:
+                name = names[rng.randrange(len(names))]
+                function, factory = routes[name]
+                started = time.perf_counter()
+                writer.write(encode_request(function, factory(rng)))
+                status = await read_response(reader)
+                latencies, statuses = samples[name]
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(client(index) for index in range(connections)))
+    return samples
+
+def client_process(port: int, jobs: int, users: int, selected: List[str], connections: int,
+                   duration: float, seed: int) -> Samples:
+    routes = {name: spec for name, spec in route_table(jobs, users).items() if name in selected}
+    return asyncio.run(drive_connections(port, routes, connections, duration, seed))
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f'server exited with status {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    sys.exit(f'server did not listen on port {port} within {timeout}s')
+
+def run(args: argparse.Namespace, workers: int, selected: List[str]) -> Dict[str, Any]:
+    server = subprocess.Popen([
+        sys.executable, SERVER_SCRIPT, '--port', str(args.port),
+        '--workers', str(workers), '--threads', str(args.threads)
+    ], stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port, server)
+        per_process = max(1, args.connections // args.client_processes)
+        # Untimed warm-up: imports, pools and matching indexes load in every worker first
+        client_process(args.port, args.jobs, args.users, selected, per_process, args.warmup, args.seed)
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.client_processes) as pool:
+            futures = [
+                pool.submit(client_process, args.port, args.jobs, args.users, selected,
+                            per_process, args.duration, args.seed + index)
+                for index in range(args.client_processes)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    routes: Dict[str, Any] = {}
+    total = 0
+    for name in selected:
+        latencies = [latency for samples in results for latency in samples[name][0]]
+        statuses: Dict[str, int] = {}
+        for samples in results:
+            for status, count in samples[name][1].items():
+                statuses[status] = statuses.get(status, 0) + count
+        total += len(latencies)
+        routes[name] = {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            **latency_summary(latencies),
+            'status_codes': statuses
+        }
+    return {
+        'workers': workers,
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1),
+        'routes': routes
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=500000)
+    parser.add_argument('--applications', type=int, default=1000000)
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts to measure')
+    parser.add_argument('--threads', type=int, default=8, help='handler threads (and pool size) per worker')
+    parser.add_argument('--connections', type=int, default=64, help='concurrent keep-alive client connections')
+    parser.add_argument('--client-processes', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per worker count')
+    parser.add_argument('--warmup', type=float, default=3.0, help='untimed seconds before each measurement')
+    parser.add_argument('--routes', default='', help='comma separated subset of load_harness routes (default: all)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--reuse', action='store_true', help='reuse an already seeded schema')
+    parser.add_argument('--keep', action='store_true', help='keep the seeded schema for later --reuse runs')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    routes = route_table(args.jobs, args.users)
+    selected = [name.strip() for name in args.routes.split(',') if name.strip()] or list(routes)
+    unknown = [name for name in selected if name not in routes]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    conn = connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    if not args.reuse:
+        create_schema(cursor, SCHEMA)
+        populate(cursor, args.jobs, args.users, args.applications)
+
+    # The server inherits the environment; libpq applies PGOPTIONS to every new connection
+    os.environ['PGOPTIONS'] = f'-c search_path={SCHEMA}'
+    report: Dict[str, Any] = {
+        'dataset': {'jobs': args.jobs, 'users': args.users, 'applications': args.applications},
+        'threads': args.threads,
+        'connections': args.connections,
+        'client_processes': args.client_processes,
+        'duration_s': args.duration,
+        'runs': [run(args, int(workers), selected) for workers in args.workers.split(',') if workers.strip()]
+    }
+
+    if not args.keep:
+        cursor.execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+    cursor.close()
+    conn.close()
+
+    emit(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, default=str)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+'''
+Business: Compare row fan-out of the old DISTINCT + job_skills join listing with the job_search projection skill filter
+Args: DATABASE_URL (disposable database), --jobs, --skills-per-job, --filter-skills, --repeat, --keep
+Returns: JSON report with execution time, peak join rows and de-duplication nodes per query shape
+'''
+import argparse
+import statistics
+from typing import Any, Dict, List
+
+from common import apply_migration, connect, emit, explain, load_function, walk_plan
+
+SCHEMA = 'bench_fanout'
+SKILL_POOL = 200
+
+# The EXISTS semi-join over job_skills that first replaced LEGACY_QUERY is no longer
+# measured here: the listing now filters job_search.skill_ids (&& / @>), which is what
+# the projection_* shapes below run, built by the jobs handler's own build_list_query.
+LEGACY_QUERY = '''
+    SELECT DISTINCT j.*,
+           c.name as category_name,
+           i.name as industry_name,
+           co.name as company_name,
+           ci.name as city_name,
+           ct.name as country_name,
+           u.first_name || ' ' || u.last_name as employer_name
+    FROM jobs j
+    LEFT JOIN categories c ON j.category_id = c.id
+    LEFT JOIN industries i ON j.industry_id = i.id
+    LEFT JOIN companies co ON j.company_id = co.id
+    LEFT JOIN cities ci ON j.city_id = ci.id
+    LEFT JOIN countries ct ON j.country_id = ct.id
+    LEFT JOIN users u ON j.employer_id = u.id
+    LEFT JOIN job_skills js ON j.id = js.job_id
+    LEFT JOIN skills s ON js.skill_id = s.id
+    WHERE j.status = 'active' AND s.id = ANY(%s)
+    ORDER BY j.created_at DESC, j.id DESC LIMIT %s
+'''
+
+def seed(cursor: Any, jobs: int, skills_per_job: int) -> None:
+    cursor.execute(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE')
+    cursor.execute(f'CREATE SCHEMA {SCHEMA}')
+    cursor.execute(f'SET search_path TO {SCHEMA}')
+    for table in ('categories', 'industries', 'companies', 'countries', 'cities', 'skills'):
+        cursor.execute(f'CREATE TABLE {table} (id SERIAL PRIMARY KEY, name VARCHAR(255) NOT NULL)')
+        cursor.execute(f"INSERT INTO {table} (name) SELECT '{table} ' || g FROM generate_series(1, %s) g", (SKILL_POOL,))
+    cursor.execute('CREATE TABLE users (id SERIAL PRIMARY KEY, first_name VARCHAR(100), last_name VARCHAR(100))')
+    cursor.execute("INSERT INTO users (first_name, last_name) SELECT 'Employer', g::text FROM generate_series(1, 500) g")
+    cursor.execute('''
+        CREATE TABLE jobs (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(500) NOT NULL,
+            description TEXT NOT NULL,
+            requirements TEXT, responsibilities TEXT,
+            salary_min NUMERIC(12, 2), salary_max NUMERIC(12, 2), salary_currency VARCHAR(10) DEFAULT 'RUB',
+            status VARCHAR(50) DEFAULT 'active',
+            category_id INTEGER, industry_id INTEGER, company_id INTEGER,
+            city_id INTEGER, country_id INTEGER, employer_id INTEGER,
+            employment_type VARCHAR(50), experience_required VARCHAR(50),
+            remote_allowed BOOLEAN DEFAULT false,
+            deadline DATE,
+            applications_count INTEGER DEFAULT 0,
+            views_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            search_vector tsvector GENERATED ALWAYS AS (
+                to_tsvector('russian', coalesce(title, '') || ' ' || coalesce(description, ''))
+            ) STORED
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO jobs (title, description, category_id, industry_id, company_id,
+                          city_id, country_id, employer_id, created_at)
+        SELECT 'Job ' || g, 'Description ' || g, g %% 200 + 1, g %% 200 + 1, g %% 200 + 1,
+               g %% 200 + 1, g %% 200 + 1, g %% 500 + 1, now() - g * interval '1 minute'
+        FROM generate_series(1, %s) g
+    ''', (jobs,))
+    cursor.execute('''
+        CREATE TABLE job_skills (
+            job_id INTEGER NOT NULL, skill_id INTEGER NOT NULL, required BOOLEAN DEFAULT true,
+            PRIMARY KEY (job_id, skill_id)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO job_skills (job_id, skill_id, required)
+        SELECT j, (j * 7 + k * 13) %% %s + 1, k < 10
+        FROM generate_series(1, %s) j, generate_series(0, %s) k
+    ''', (SKILL_POOL, jobs, skills_per_job - 1))
+    cursor.execute('CREATE INDEX ON job_skills (skill_id, job_id)')
+    cursor.execute('CREATE INDEX ON jobs (created_at DESC, id DESC) WHERE status = %s', ('active',))
+    apply_migration(cursor, 'V0007__job_search_projection.sql')
+    cursor.execute('ANALYZE')
+
+def measure(cursor: Any, query: str, params: List[Any], repeat: int) -> Dict[str, Any]:
+    timings = []
+    plan = None
+    for _ in range(repeat):
+        plan = explain(cursor, query, params)
+        timings.append(plan['Execution Time'])
+
+    nodes = list(walk_plan(plan['Plan']))
+    join_rows = [node['Actual Rows'] * node['Actual Loops'] for node in nodes if 'Join Type' in node]
+    return {
+        'execution_ms_median': round(statistics.median(timings), 3),
+        'peak_join_rows': max(join_rows, default=0),
+        'dedup_nodes': sorted({node['Node Type'] for node in nodes if node['Node Type'] in ('Unique', 'HashAggregate')}),
+        'result_rows': plan['Plan']['Actual Rows']
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=20000)
+    parser.add_argument('--skills-per-job', type=int, default=20)
+    parser.add_argument('--filter-skills', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help='keep the seeded schema for manual inspection')
+    args = parser.parse_args()
+
+    jobs_function = load_function('jobs')
+    skill_ids = [1 + k * 13 for k in range(args.filter_skills)]
+
+    conn = connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    seed(cursor, args.jobs, args.skills_per_job)
+
+    report: Dict[str, Any] = {
+        'dataset': {'jobs': args.jobs, 'skills_per_job': args.skills_per_job, 'filter_skills': skill_ids},
+        'legacy_distinct_join': measure(cursor, LEGACY_QUERY, [skill_ids, args.limit + 1], args.repeat)
+    }
+    for mode in ('any', 'all'):
+        params = {'skills': ','.join(map(str, skill_ids)), 'skills_match': mode}
+        query, query_params, _ = jobs_function.build_list_query(params, args.limit)
+        report[f'projection_{mode}'] = measure(cursor, query, query_params, args.repeat)
+
+    if not args.keep:
+        cursor.execute(f'DROP SCHEMA {SCHEMA} CASCADE')
+    cursor.close()
+    conn.close()
+    emit(report)
+
+if __name__ == '__main__':
+    main()
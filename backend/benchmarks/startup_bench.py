@@ -0,0 +1,100 @@
+'''
+Business: Cold-start benchmark - import-to-first-response time of each function in fresh interpreters
+Args: --runs, --functions, --probe options|get, --baseline REV to measure an older revision of backend/ as well
+Returns: JSON report with process, import and first-response latency summaries per function and tree
+'''
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from common import BACKEND_DIR, FUNCTIONS, emit, latency_summary
+
+PROBE_EVENTS = {
+    'options': {'httpMethod': 'OPTIONS', 'headers': {}},
+    'get': {'httpMethod': 'GET', 'queryStringParameters': {}, 'headers': {}}
+}
+
+PROBE = '''
+import importlib.util, json, sys, time
+started = time.perf_counter()
+backend_dir, name, event = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+sys.path.insert(0, backend_dir)
+spec = importlib.util.spec_from_file_location(name + '_index', backend_dir + '/' + name + '/index.py')
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+response = module.handler(event, None)
+responded = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_response_ms': (responded - started) * 1000,
+    'status': response['statusCode'],
+    'psycopg2_loaded': 'psycopg2' in sys.modules,
+    'modules': len(sys.modules)
+}))
+'''
+
+def probe(backend_dir: str, function: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE, backend_dir, function, json.dumps(event)],
+        capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+def measure(backend_dir: str, function: str, event: Dict[str, Any], runs: int) -> Dict[str, Any]:
+    '''One untimed run first writes __pycache__, as a deployed package would ship it.'''
+    probe(backend_dir, function, event)
+    samples: List[Dict[str, Any]] = [probe(backend_dir, function, event) for _ in range(runs)]
+    return {
+        'status': samples[-1]['status'],
+        'psycopg2_loaded': samples[-1]['psycopg2_loaded'],
+        'modules': samples[-1]['modules'],
+        'process_ms': latency_summary([sample['process_ms'] for sample in samples]),
+        'import_ms': latency_summary([sample['import_ms'] for sample in samples]),
+        'first_response_ms': latency_summary([sample['first_response_ms'] for sample in samples])
+    }
+
+def extract_revision(revision: str, target: str) -> str:
+    '''backend/ as of revision, via git archive, so the baseline runs from its own tree.'''
+    repo_dir = os.path.dirname(BACKEND_DIR)
+    archive = subprocess.run(['git', 'archive', revision, 'backend'], cwd=repo_dir, capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', target], input=archive.stdout, check=True)
+    return os.path.join(target, 'backend')
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20, help='fresh interpreters per function and tree')
+    parser.add_argument('--functions', default='', help='comma separated subset (default: all)')
+    parser.add_argument('--probe', choices=sorted(PROBE_EVENTS), default='options',
+                        help='first request: options needs no database, get needs DATABASE_URL')
+    parser.add_argument('--baseline', help='git revision to compare against, e.g. HEAD~1')
+    args = parser.parse_args()
+
+    functions = [name.strip() for name in args.functions.split(',') if name.strip()] or list(FUNCTIONS)
+    event = PROBE_EVENTS[args.probe]
+    report: Dict[str, Any] = {'probe': args.probe, 'runs': args.runs, 'python': sys.version.split()[0], 'functions': {}}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        trees = {'current': BACKEND_DIR}
+        if args.baseline:
+            trees['baseline'] = extract_revision(args.baseline, workdir)
+            report['baseline'] = args.baseline
+        for function in functions:
+            report['functions'][function] = {
+                tree: measure(backend_dir, function, event, args.runs)
+                for tree, backend_dir in trees.items()
+                if os.path.exists(os.path.join(backend_dir, function, 'index.py'))
+            }
+
+    emit(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+'''
+Business: Vendor backend/shared into every function folder - each function deploys from its own directory
+Args: --check to only verify the copies without writing (exit status 1 when any copy is stale)
+Returns: one line per function folder whose copy was written or is out of date
+'''
+import argparse
+import os
+import shutil
+import sys
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(BACKEND_DIR, 'shared')
+
+def function_dirs() -> List[str]:
+    return sorted(
+        os.path.join(BACKEND_DIR, name) for name in os.listdir(BACKEND_DIR)
+        if os.path.isfile(os.path.join(BACKEND_DIR, name, 'index.py'))
+    )
+
+def read_sources(directory: str) -> Dict[str, bytes]:
+    if not os.path.isdir(directory):
+        return {}
+    sources = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            with open(os.path.join(directory, name), 'rb') as source:
+                sources[name] = source.read()
+    return sources
+
+def sync(target: str, sources: Dict[str, bytes]) -> None:
+    '''Replace target with exactly the shared sources; nothing function-specific lives in the copy.'''
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    os.makedirs(target)
+    for name, content in sources.items():
+        with open(os.path.join(target, name), 'wb') as copy:
+            copy.write(content)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--check', action='store_true', help='fail instead of writing when a copy differs')
+    args = parser.parse_args()
+
+    sources = read_sources(SHARED_DIR)
+    stale = []
+    for function_dir in function_dirs():
+        target = os.path.join(function_dir, 'shared')
+        if read_sources(target) == sources:
+            continue
+        stale.append(os.path.basename(function_dir))
+        if not args.check:
+            sync(target, sources)
+
+    for name in stale:
+        print(f"{name}/shared {'is out of date' if args.check else 'updated'}")
+    if args.check and stale:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -4,30 +4,96 @@ Args: event with httpMethod, body, queryStringParameters
 Returns: HTTP response with job data or status
 '''
 import json
-import os
-from typing import Dict, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import re
+from typing import Dict, Any, List, Optional, Tuple
 
-def get_db_connection():
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn)
+from shared import batch
+from shared import counters
+from shared import db
+from shared import http_cache
+from shared import instrumentation
+from shared import pagination
+from shared import query_builder
+from shared import runtime
+from shared import skills
 
+SEARCH_TSQUERY = "(to_tsquery('russian', %s) || to_tsquery('english', %s))"
+
+def build_search_query(search: str) -> Optional[str]:
+    words = re.findall(r'\w+', search.lower())
+    if not words:
+        return None
+    return ' & '.join(f'{word}:*' for word in words)
+
+LIST_FILTERS = {
+    'category_id': query_builder.Filter('j.category_id = %s', query_builder.integer),
+    'industry_id': query_builder.Filter('j.industry_id = %s', query_builder.integer),
+    'city_id': query_builder.Filter('j.city_id = %s', query_builder.integer),
+    'employment_type': query_builder.Filter('j.employment_type = %s'),
+    'experience': query_builder.Filter('j.experience_required = %s'),
+    'remote_only': query_builder.Filter('j.remote_allowed = true', query_builder.flag),
+    'employer_id': query_builder.Filter('j.employer_id = %s', query_builder.integer)
+}
+
+# The listing reads exactly these job_search columns; search_vector and skill_ids stay in the database
+LIST_COLUMNS = (
+    'id', 'title', 'description', 'requirements', 'responsibilities',
+    'salary_min', 'salary_max', 'salary_currency', 'employment_type', 'experience_required',
+    'category_id', 'industry_id', 'company_id', 'employer_id', 'city_id', 'country_id',
+    'remote_allowed', 'deadline', 'status', 'applications_count', 'views_count',
+    'created_at', 'updated_at',
+    'category_name', 'industry_name', 'company_name', 'city_name', 'country_name', 'employer_name'
+)
+LIST_SELECT = ', '.join(f'j.{column}' for column in LIST_COLUMNS)
+INTERNAL_COLUMNS = ('search_vector', 'employer_updated_at', 'reference_version')
+JOB_VALIDATOR_COLUMNS = (
+    'id', 'updated_at', 'applications_count', 'views_count',
+    'employer_updated_at', 'reference_version'
+)
+
+JOB_DETAIL_QUERY = '''
+    SELECT j.*, 
+           c.name as category_name,
+           i.name as industry_name,
+           co.name as company_name,
+           ci.name as city_name,
+           ct.name as country_name,
+           u.first_name || ' ' || u.last_name as employer_name,
+           u.updated_at as employer_updated_at,
+           (SELECT version FROM reference_data_version WHERE id = 1) as reference_version,
+           COALESCE(json_agg(
+               json_build_object('id', s.id, 'name', s.name, 'required', js.required)
+           ) FILTER (WHERE s.id IS NOT NULL), '[]') as skills
+    FROM jobs j
+    LEFT JOIN categories c ON j.category_id = c.id
+    LEFT JOIN industries i ON j.industry_id = i.id
+    LEFT JOIN companies co ON j.company_id = co.id
+    LEFT JOIN cities ci ON j.city_id = ci.id
+    LEFT JOIN countries ct ON j.country_id = ct.id
+    LEFT JOIN users u ON j.employer_id = u.id
+    LEFT JOIN job_skills js ON j.id = js.job_id
+    LEFT JOIN skills s ON js.skill_id = s.id
+    WHERE {condition}
+    GROUP BY j.id, c.name, i.name, co.name, ci.name, ct.name, u.first_name, u.last_name, u.updated_at
+'''
+
+def public_job(job: Any) -> Any:
+    for column in INTERNAL_COLUMNS:
+        job.pop(column, None)
+    return job
+
+def job_etag(row: Any) -> str:
+    return http_cache.validator_etag('job', *(row[column] for column in JOB_VALIDATOR_COLUMNS))
+
+PREFLIGHT = runtime.preflight('GET, POST, PUT, DELETE, OPTIONS', 'Content-Type, X-User-Id, If-None-Match, X-Read-Primary')
+JOB_NOT_FOUND = runtime.error(404, 'Job not found')
+
+@instrumentation.instrument('jobs')
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return runtime.static(PREFLIGHT)
     
     try:
         if method == 'GET':
@@ -37,137 +103,138 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif method == 'PUT':
             return update_job(event)
         else:
-            return {
-                'statusCode': 405,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Method not allowed'}),
-                'isBase64Encoded': False
-            }
+            return runtime.static(runtime.METHOD_NOT_ALLOWED)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
+        return runtime.error(500, str(e))
 
 def get_jobs(event: Dict[str, Any]) -> Dict[str, Any]:
     params = event.get('queryStringParameters') or {}
     job_id = params.get('id')
     
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    if params.get('ids'):
+        return get_jobs_batch(event, params['ids'])
     
     if job_id:
-        cursor.execute('''
-            SELECT j.*, 
-                   c.name as category_name,
-                   i.name as industry_name,
-                   co.name as company_name,
-                   ci.name as city_name,
-                   ct.name as country_name,
-                   u.first_name || ' ' || u.last_name as employer_name,
-                   COALESCE(json_agg(
-                       json_build_object('id', s.id, 'name', s.name, 'required', js.required)
-                   ) FILTER (WHERE s.id IS NOT NULL), '[]') as skills
-            FROM jobs j
-            LEFT JOIN categories c ON j.category_id = c.id
-            LEFT JOIN industries i ON j.industry_id = i.id
-            LEFT JOIN companies co ON j.company_id = co.id
-            LEFT JOIN cities ci ON j.city_id = ci.id
-            LEFT JOIN countries ct ON j.country_id = ct.id
-            LEFT JOIN users u ON j.employer_id = u.id
-            LEFT JOIN job_skills js ON j.id = js.job_id
-            LEFT JOIN skills s ON js.skill_id = s.id
-            WHERE j.id = %s
-            GROUP BY j.id, c.name, i.name, co.name, ci.name, ct.name, u.first_name, u.last_name
-        ''', (job_id,))
-        job = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with db.read_connection(event) as conn:
+            cursor = runtime.dict_cursor(conn)
+            
+            if http_cache.get_header(event, 'If-None-Match'):
+                cursor.execute('''
+                    SELECT j.id, j.updated_at, j.applications_count, j.views_count,
+                           u.updated_at as employer_updated_at,
+                           (SELECT version FROM reference_data_version WHERE id = 1) as reference_version
+                    FROM jobs j
+                    LEFT JOIN users u ON j.employer_id = u.id
+                    WHERE j.id = %s
+                ''', (job_id,))
+                validators = cursor.fetchone()
+                if validators and http_cache.is_not_modified(event, job_etag(validators)):
+                    cursor.close()
+                    return http_cache.not_modified_response(job_etag(validators), http_cache.JOB_CACHE_CONTROL)
+            
+            query_builder.execute(cursor, JOB_DETAIL_QUERY.format(condition='j.id = %s'), (job_id,))
+            job = cursor.fetchone()
+            cursor.close()
         
         if not job:
-            return {
-                'statusCode': 404,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Job not found'}),
-                'isBase64Encoded': False
-            }
+            return runtime.static(JOB_NOT_FOUND)
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(dict(job), default=str),
-            'isBase64Encoded': False
-        }
+        etag = job_etag(job)
+        return runtime.json_response(200, public_job(job), {**runtime.JSON_HEADERS, **http_cache.cache_headers(etag, http_cache.JOB_CACHE_CONTROL)})
     
-    category_id = params.get('category_id')
-    industry_id = params.get('industry_id')
-    city_id = params.get('city_id')
-    employment_type = params.get('employment_type')
-    experience = params.get('experience')
+    try:
+        limit = pagination.parse_limit(params.get('limit'))
+        sort = pagination.SORT_NUMBER if build_search_query(params.get('search', '')) else pagination.SORT_TIMESTAMP
+        after = pagination.decode_cursor(params['cursor'], sort) if params.get('cursor') else None
+        query, query_params, sort_keys = build_list_query(params, limit, after)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        cursor = runtime.dict_cursor(conn)
+        query_builder.execute(cursor, query, query_params)
+        jobs = cursor.fetchall()
+        cursor.close()
+    
+    jobs, next_cursor = pagination.split_page(jobs, limit, sort_keys)
+    
+    return runtime.json_response(200, jobs, {**runtime.JSON_HEADERS, **pagination.page_headers(next_cursor)})
+
+def get_jobs_batch(event: Dict[str, Any], raw_ids: str) -> Dict[str, Any]:
+    try:
+        job_ids = batch.parse_ids(raw_ids)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        cursor = runtime.dict_cursor(conn)
+        query_builder.execute(cursor, JOB_DETAIL_QUERY.format(condition='j.id = ANY(%s)'), (job_ids,))
+        jobs = cursor.fetchall()
+        cursor.close()
+    
+    items, missing = batch.order_by_ids(jobs, job_ids)
+    
+    return runtime.json_response(200, {'items': [public_job(job) for job in items], 'missing': missing})
+
+def build_list_query(params: Dict[str, Any], limit: int, after: Optional[List[Any]] = None) -> Tuple[str, List[Any], Tuple[str, str]]:
     search = params.get('search', '')
-    remote_only = params.get('remote_only') == 'true'
-    employer_id = params.get('employer_id')
     skills_filter = params.get('skills')
+    skills_match = params.get('skills_match', 'any')
+    search_query = build_search_query(search)
     
-    query = '''
-        SELECT DISTINCT j.*, 
-               c.name as category_name,
-               i.name as industry_name,
-               co.name as company_name,
-               ci.name as city_name,
-               ct.name as country_name,
-               u.first_name || ' ' || u.last_name as employer_name
-        FROM jobs j
-        LEFT JOIN categories c ON j.category_id = c.id
-        LEFT JOIN industries i ON j.industry_id = i.id
-        LEFT JOIN companies co ON j.company_id = co.id
-        LEFT JOIN cities ci ON j.city_id = ci.id
-        LEFT JOIN countries ct ON j.country_id = ct.id
-        LEFT JOIN users u ON j.employer_id = u.id
-        LEFT JOIN job_skills js ON j.id = js.job_id
-        LEFT JOIN skills s ON js.skill_id = s.id
+    if skills_match not in ('any', 'all'):
+        raise ValueError(f'Invalid skills_match: {skills_match}')
+    
+    select_params = []
+    rank_column = ''
+    if search_query:
+        rank_column = f",\n               ts_rank_cd(j.search_vector, {SEARCH_TSQUERY}) as search_rank"
+        select_params.extend([search_query, search_query])
+    
+    query = f'''
+        SELECT {LIST_SELECT}{rank_column}
+        FROM job_search j
         WHERE j.status = 'active'
     '''
     
     conditions = []
-    if search:
-        conditions.append(f"(j.title ILIKE '%{search}%' OR j.description ILIKE '%{search}%')")
-    if category_id:
-        conditions.append(f"j.category_id = {category_id}")
-    if industry_id:
-        conditions.append(f"j.industry_id = {industry_id}")
-    if city_id:
-        conditions.append(f"j.city_id = {city_id}")
-    if employment_type:
-        conditions.append(f"j.employment_type = '{employment_type}'")
-    if experience:
-        conditions.append(f"j.experience_required = '{experience}'")
-    if remote_only:
-        conditions.append("j.remote_allowed = true")
-    if employer_id:
-        conditions.append(f"j.employer_id = {employer_id}")
+    query_params = list(select_params)
+    if search_query:
+        conditions.append(f"j.search_vector @@ {SEARCH_TSQUERY}")
+        query_params.extend([search_query, search_query])
+    filter_conditions, filter_params = query_builder.build_conditions(params, LIST_FILTERS)
+    conditions.extend(filter_conditions)
+    query_params.extend(filter_params)
     if skills_filter:
-        skill_ids = skills_filter.split(',')
-        conditions.append(f"s.id IN ({','.join(skill_ids)})")
+        try:
+            skill_ids = sorted({int(skill_id) for skill_id in skills_filter.split(',') if skill_id.strip()})
+        except ValueError:
+            raise ValueError(f'Invalid skills filter: {skills_filter}')
+        if skills_match == 'all':
+            conditions.append('j.skill_ids @> %s::int[]')
+        else:
+            conditions.append('j.skill_ids && %s::int[]')
+        query_params.append(skill_ids)
+    if after and search_query:
+        # ts_rank_cd is real; cast the cursor back to real so the comparison is not done in float8
+        conditions.append(f"(ts_rank_cd(j.search_vector, {SEARCH_TSQUERY}), j.id) < (%s::real, %s)")
+        query_params.extend([search_query, search_query, *after])
+    elif after:
+        conditions.append("(j.created_at, j.id) < (%s, %s)")
+        query_params.extend(after)
     
     if conditions:
         query += ' AND ' + ' AND '.join(conditions)
     
-    query += ' ORDER BY j.created_at DESC LIMIT 100'
+    if search_query:
+        query += ' ORDER BY search_rank DESC, j.id DESC LIMIT %s'
+        sort_keys = ('search_rank', 'id')
+    else:
+        query += ' ORDER BY j.created_at DESC, j.id DESC LIMIT %s'
+        sort_keys = ('created_at', 'id')
+    query_params.append(limit + 1)
     
-    cursor.execute(query)
-    jobs = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps([dict(job) for job in jobs], default=str),
-        'isBase64Encoded': False
-    }
+    return query, query_params, sort_keys
 
 def create_job(event: Dict[str, Any]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
@@ -175,79 +242,57 @@ def create_job(event: Dict[str, Any]) -> Dict[str, Any]:
     required_fields = ['title', 'description', 'employer_id']
     for field in required_fields:
         if field not in body_data:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': f'Missing required field: {field}'}),
-                'isBase64Encoded': False
-            }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('''
-        INSERT INTO jobs (
-            title, description, requirements, responsibilities,
-            salary_min, salary_max, salary_currency, employment_type,
-            experience_required, category_id, industry_id, company_id,
-            employer_id, city_id, country_id, remote_allowed, deadline
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING *
-    ''', (
-        body_data['title'],
-        body_data['description'],
-        body_data.get('requirements'),
-        body_data.get('responsibilities'),
-        body_data.get('salary_min'),
-        body_data.get('salary_max'),
-        body_data.get('salary_currency', 'RUB'),
-        body_data.get('employment_type'),
-        body_data.get('experience_required'),
-        body_data.get('category_id'),
-        body_data.get('industry_id'),
-        body_data.get('company_id'),
-        body_data['employer_id'],
-        body_data.get('city_id'),
-        body_data.get('country_id'),
-        body_data.get('remote_allowed', False),
-        body_data.get('deadline')
-    ))
+            return runtime.error(400, f'Missing required field: {field}')
     
-    job = cursor.fetchone()
-    job_id = job['id']
-    
-    if 'skills' in body_data and body_data['skills']:
-        for skill_id in body_data['skills']:
-            cursor.execute('''
-                INSERT INTO job_skills (job_id, skill_id, required)
-                VALUES (%s, %s, %s)
-            ''', (job_id, skill_id, True))
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db.connection() as conn:
+        cursor = runtime.dict_cursor(conn)
+        
+        cursor.execute('''
+            INSERT INTO jobs (
+                title, description, requirements, responsibilities,
+                salary_min, salary_max, salary_currency, employment_type,
+                experience_required, category_id, industry_id, company_id,
+                employer_id, city_id, country_id, remote_allowed, deadline
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING *
+        ''', (
+            body_data['title'],
+            body_data['description'],
+            body_data.get('requirements'),
+            body_data.get('responsibilities'),
+            body_data.get('salary_min'),
+            body_data.get('salary_max'),
+            body_data.get('salary_currency', 'RUB'),
+            body_data.get('employment_type'),
+            body_data.get('experience_required'),
+            body_data.get('category_id'),
+            body_data.get('industry_id'),
+            body_data.get('company_id'),
+            body_data['employer_id'],
+            body_data.get('city_id'),
+            body_data.get('country_id'),
+            body_data.get('remote_allowed', False),
+            body_data.get('deadline')
+        ))
+        
+        job = cursor.fetchone()
+        job_id = job['id']
+        
+        if 'skills' in body_data and body_data['skills']:
+            desired = {int(skill_id): True for skill_id in body_data['skills']}
+            skills.sync_skill_links(cursor, 'job_skills', job_id, desired)
+        
+        conn.commit()
+        cursor.close()
     
-    return {
-        'statusCode': 201,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(dict(job), default=str),
-        'isBase64Encoded': False
-    }
+    return runtime.json_response(201, public_job(job))
 
 def update_job(event: Dict[str, Any]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
     job_id = body_data.get('id')
     
     if not job_id:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Missing job id'}),
-            'isBase64Encoded': False
-        }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+        return runtime.error(400, 'Missing job id')
     
     update_fields = []
     values = []
@@ -261,30 +306,28 @@ def update_job(event: Dict[str, Any]) -> Dict[str, Any]:
     if 'description' in body_data:
         update_fields.append('description = %s')
         values.append(body_data['description'])
-    if 'views_count' in body_data:
-        update_fields.append('views_count = views_count + 1')
-    
-    if not update_fields:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'No fields to update'}),
-            'isBase64Encoded': False
-        }
+    count_view = 'views_count' in body_data
     
-    values.append(job_id)
-    query = f"UPDATE jobs SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = %s RETURNING *"
+    if not update_fields and not count_view:
+        return runtime.error(400, 'No fields to update')
     
-    cursor.execute(query, values)
-    job = cursor.fetchone()
+    job = None
+    with db.connection() as conn:
+        cursor = runtime.dict_cursor(conn)
+        
+        if count_view:
+            counters.record_job_view(cursor, job_id)
+        
+        if update_fields:
+            values.append(job_id)
+            query = f"UPDATE jobs SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = %s RETURNING *"
+            cursor.execute(query, values)
+            job = cursor.fetchone()
+        
+        conn.commit()
+        cursor.close()
     
-    conn.commit()
-    cursor.close()
-    conn.close()
+    if not update_fields:
+        return runtime.response(202, json.dumps({'id': job_id, 'view_recorded': True}))
     
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(dict(job) if job else {}, default=str),
-        'isBase64Encoded': False
-    }
+    return runtime.json_response(200, public_job(job) if job else {})
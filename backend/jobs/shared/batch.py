@@ -0,0 +1,34 @@
+'''
+Business: Batch lookups by id - parse ?ids=1,2,3, keep request order, report missing ids
+Args: raw ids parameter, rows fetched with a single id = ANY(...) query
+Returns: ordered items plus the list of ids that were not found
+'''
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_BATCH_SIZE = 100
+
+def parse_ids(raw: Optional[str], maximum: int = MAX_BATCH_SIZE) -> List[int]:
+    ids: List[int] = []
+    seen = set()
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            value = int(part)
+        except ValueError:
+            raise ValueError(f'Invalid id: {part}')
+        if value not in seen:
+            seen.add(value)
+            ids.append(value)
+    if not ids:
+        raise ValueError('No ids given')
+    if len(ids) > maximum:
+        raise ValueError(f'Too many ids: {len(ids)} (max {maximum})')
+    return ids
+
+def order_by_ids(rows: List[Any], ids: List[int]) -> Tuple[List[Any], List[int]]:
+    by_id: Dict[int, Any] = {row['id']: row for row in rows}
+    items = [by_id[item_id] for item_id in ids if item_id in by_id]
+    missing = [item_id for item_id in ids if item_id not in by_id]
+    return items, missing
@@ -0,0 +1,324 @@
+'''
+Business: Module-level PostgreSQL connection pools shared by all backend handlers, with read-replica routing
+Args: DATABASE_URL, optional DATABASE_READ_URL (space separated replicas), DB_POOL_* and DB_REPLICA_* variables
+Returns: pooled psycopg2 connections via the connection() and read_connection() context managers
+'''
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from shared import http_cache
+from shared import instrumentation
+from shared import serializer
+
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '4'))
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get('DB_POOL_ACQUIRE_TIMEOUT', '5'))
+POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', '30'))
+POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', '600'))
+READ_URLS = os.environ.get('DATABASE_READ_URL', '').split()
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '5'))
+REPLICA_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_CHECK_INTERVAL', '5'))
+READ_PRIMARY_HEADER = 'X-Read-Primary'
+
+REPLICA_LAG_QUERY = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+def logger() -> Any:
+    '''Module logger; logging is imported on the first pool miss, not at cold start.'''
+    import logging
+
+    return logging.getLogger(__name__)
+
+class PoolExhausted(Exception):
+    pass
+
+class PooledConnection:
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+class ConnectionPool:
+    '''
+    LIFO pool capped at max_size connections per container. Idle connections are
+    pinged with SELECT 1 before reuse once they have been idle longer than ping_after
+    seconds, and recycled after max_lifetime seconds.
+    '''
+
+    def __init__(self, dsn: Optional[str], max_size: int = POOL_MAX_SIZE,
+                 acquire_timeout: float = POOL_ACQUIRE_TIMEOUT,
+                 ping_after: float = POOL_PING_AFTER,
+                 max_lifetime: float = POOL_MAX_LIFETIME,
+                 on_connect: Optional[Callable[[Any], None]] = None,
+                 connection_factory: Optional[type] = None):
+        self.dsn = dsn
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.ping_after = ping_after
+        self.max_lifetime = max_lifetime
+        self.on_connect = on_connect
+        self.connection_factory = connection_factory
+        self._idle: List[PooledConnection] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def acquire(self) -> PooledConnection:
+        import psycopg2
+        entry = self._checkout()
+        if entry is not None:
+            if self._is_healthy(entry):
+                with self._cond:
+                    self.hits += 1
+                return entry
+            self._close(entry.conn)
+
+        try:
+            conn = psycopg2.connect(self.dsn, connection_factory=self.connection_factory)
+            if self.on_connect:
+                self.on_connect(conn)
+            entry = PooledConnection(conn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self.misses += 1
+        logger().debug('db pool miss: %s', self.stats())
+        return entry
+
+    def release(self, entry: PooledConnection, discard: bool = False) -> None:
+        import psycopg2
+        conn = entry.conn
+        keep = not discard and not conn.closed
+
+        if keep and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                keep = False
+
+        if keep and time.monotonic() - entry.created_at > self.max_lifetime:
+            keep = False
+
+        if not keep:
+            self._close(conn)
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def close_all(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            entry.conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'hits': self.hits,
+                'misses': self.misses,
+                'discarded': self.discarded
+            }
+
+    def _checkout(self) -> Optional[PooledConnection]:
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f'No free database connection after {self.acquire_timeout}s')
+                self._cond.wait(remaining)
+            self._in_use += 1
+            return self._idle.pop() if self._idle else None
+
+    def _is_healthy(self, entry: PooledConnection) -> bool:
+        import psycopg2
+        conn = entry.conn
+        if conn.closed:
+            return False
+
+        now = time.monotonic()
+        if now - entry.created_at > self.max_lifetime:
+            return False
+        if now - entry.last_used < self.ping_after:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close(self, conn: Any) -> None:
+        import psycopg2
+        with self._cond:
+            self.discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+class Replica:
+    __slots__ = ('pool', 'lag', 'checked_at', 'healthy')
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.lag: Optional[float] = None
+        self.checked_at = float('-inf')
+        self.healthy = True
+
+class ReplicaRouter:
+    '''
+    Round-robin over replica pools. Replication lag is measured on a borrowed connection at
+    most once per check_interval per replica; a replica that lags more than max_lag seconds
+    or fails to connect is skipped until its next check. Returns None when no replica is usable.
+    '''
+
+    def __init__(self, pools: List[ConnectionPool], max_lag: float = REPLICA_MAX_LAG,
+                 check_interval: float = REPLICA_CHECK_INTERVAL):
+        self.replicas = [Replica(pool) for pool in pools]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+
+    def acquire(self) -> Optional[Tuple[ConnectionPool, PooledConnection]]:
+        import psycopg2
+        start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            due = time.monotonic() - replica.checked_at >= self.check_interval
+            if not replica.healthy and not due:
+                continue
+            try:
+                entry = replica.pool.acquire()
+            except PoolExhausted:
+                continue
+            except psycopg2.Error:
+                self._mark(replica, None)
+                continue
+            if due and not self._check(replica, entry):
+                continue
+            return replica.pool, entry
+        return None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {'healthy': replica.healthy, 'lag': replica.lag, **replica.pool.stats()}
+            for replica in self.replicas
+        ]
+
+    def _check(self, replica: Replica, entry: PooledConnection) -> bool:
+        import psycopg2
+        try:
+            with entry.conn.cursor() as cursor:
+                cursor.execute(REPLICA_LAG_QUERY)
+                lag = float(cursor.fetchone()[0])
+            entry.conn.rollback()
+        except psycopg2.Error:
+            replica.pool.release(entry, discard=True)
+            self._mark(replica, None)
+            return False
+        self._mark(replica, lag)
+        if not replica.healthy:
+            logger().warning('replica lag %.1fs exceeds %.1fs, routing around it', lag, self.max_lag)
+            replica.pool.release(entry)
+        return replica.healthy
+
+    def _mark(self, replica: Replica, lag: Optional[float]) -> None:
+        replica.lag = lag
+        replica.checked_at = time.monotonic()
+        replica.healthy = lag is not None and lag <= self.max_lag
+
+_pool: Optional[ConnectionPool] = None
+_router: Optional[ReplicaRouter] = None
+_pool_lock = threading.Lock()
+
+def make_pool(dsn: Optional[str]) -> ConnectionPool:
+    return ConnectionPool(
+        dsn,
+        on_connect=serializer.register_numeric_as_text,
+        connection_factory=instrumentation.traced_connection_class() if instrumentation.TRACE_QUERIES else None
+    )
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = make_pool(os.environ.get('DATABASE_URL'))
+    return _pool
+
+def get_router() -> Optional[ReplicaRouter]:
+    global _router
+    if _router is None and READ_URLS:
+        with _pool_lock:
+            if _router is None:
+                _router = ReplicaRouter([make_pool(dsn) for dsn in READ_URLS])
+    return _router
+
+def acquire(readonly: bool) -> Tuple[ConnectionPool, PooledConnection]:
+    router = get_router() if readonly else None
+    routed = router.acquire() if router else None
+    if routed:
+        return routed
+    pool = get_pool()
+    return pool, pool.acquire()
+
+@contextmanager
+def connection(readonly: bool = False) -> Iterator[Any]:
+    '''
+    Borrow a connection for the duration of the block. Uncommitted work is rolled back
+    on release; connections that failed at the transport level are dropped from the pool.
+    readonly=True may be served by a replica when DATABASE_READ_URL is configured.
+    '''
+    import psycopg2
+    if instrumentation.ENABLED:
+        with instrumentation.span('connect'):
+            pool, entry = acquire(readonly)
+    else:
+        pool, entry = acquire(readonly)
+    discard = False
+    try:
+        yield entry.conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        discard = True
+        raise
+    finally:
+        pool.release(entry, discard=discard)
+
+def read_connection(event: Dict[str, Any]) -> Any:
+    '''Connection for a GET path; X-Read-Primary: true forces the primary for read-your-writes.'''
+    force_primary = (http_cache.get_header(event, READ_PRIMARY_HEADER) or '').lower() in ('1', 'true')
+    return connection(readonly=not force_primary)
+
+def pool_stats() -> Dict[str, int]:
+    return get_pool().stats()
+
+def replica_stats() -> List[Dict[str, Any]]:
+    router = get_router()
+    return router.stats() if router else []
@@ -0,0 +1,76 @@
+'''
+Business: Keyset (cursor) pagination helpers shared by list endpoints
+Args: limit and cursor query parameters, rows ordered by a (sort_key, id) pair
+Returns: page rows plus an opaque next-cursor token
+'''
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+SORT_TIMESTAMP = 'timestamp'
+SORT_NUMBER = 'number'
+
+class InvalidPage(ValueError):
+    pass
+
+def parse_limit(raw: Optional[str], default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    if raw in (None, ''):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidPage(f'Invalid limit: {raw}')
+    return max(1, min(limit, maximum))
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str, sort: str = SORT_TIMESTAMP) -> List[Any]:
+    '''
+    A (sort_key, id) pair; sort says whether the key is an ISO timestamp or a number (a
+    search rank), so a cursor from another listing mode is rejected here rather than by Postgres.
+    '''
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise InvalidPage('Invalid cursor')
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidPage('Invalid cursor')
+    sort_key, row_id = values
+    if not is_sort_key(sort_key, sort) or not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise InvalidPage('Invalid cursor')
+    return values
+
+def is_sort_key(value: Any, sort: str) -> bool:
+    if sort == SORT_NUMBER:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+def split_page(rows: List[Any], limit: int, keys: Sequence[str]) -> Tuple[List[Any], Optional[str]]:
+    '''
+    Rows must be fetched with LIMIT limit + 1: the extra row only signals that another
+    page exists and is dropped; the cursor points at the last row actually returned.
+    '''
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor([last[key] for key in keys])
+
+def page_headers(next_cursor: Optional[str]) -> Dict[str, str]:
+    headers = {'Access-Control-Expose-Headers': NEXT_CURSOR_HEADER}
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return headers
@@ -0,0 +1,53 @@
+'''
+Business: Periodic maintenance - fold application counters, flush buffered job views, drain the application outbox
+Args: event from a timer trigger (no httpMethod) or an HTTP POST, optional queryStringParameters.task to run a single task
+Returns: HTTP response with per-task results
+'''
+import json
+from typing import Dict, Any
+
+from shared import counters
+from shared import db
+from shared import instrumentation
+from shared import outbox
+from shared import runtime
+
+TASKS = {
+    'fold_application_counters': counters.fold_application_counters,
+    'flush_job_views': counters.flush_job_views,
+    'drain_application_outbox': outbox.drain_application_outbox
+}
+
+PREFLIGHT = runtime.preflight('POST, OPTIONS', 'Content-Type')
+
+@instrumentation.instrument('maintenance')
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method = event.get('httpMethod')
+    
+    if method == 'OPTIONS':
+        return runtime.static(PREFLIGHT)
+    
+    # Timer triggers carry no httpMethod; over HTTP only POST runs tasks (they send webhooks)
+    if method is not None and method != 'POST':
+        return runtime.static(runtime.METHOD_NOT_ALLOWED)
+    
+    params = event.get('queryStringParameters') or {}
+    task_name = params.get('task')
+    
+    if task_name and task_name not in TASKS:
+        return runtime.error(400, f'Unknown task: {task_name}')
+    
+    try:
+        results = {}
+        for name, task in TASKS.items():
+            if task_name and name != task_name:
+                continue
+            with db.connection() as conn:
+                cursor = runtime.dict_cursor(conn)
+                results[name] = task(cursor)
+                conn.commit()
+                cursor.close()
+        
+        return runtime.response(200, json.dumps(results))
+    except Exception as e:
+        return runtime.error(500, str(e))
@@ -0,0 +1,6 @@
+'''
+Shared runtime for the backend cloud functions (jobs, users, applications, references, ...).
+Every function deploys from its own folder, so each one carries a copy of this package at
+backend/<function>/shared and imports it as a top-level package. Edit the modules here, then
+run backend/bundle_shared.py to refresh the copies; --check fails when a copy is stale.
+'''
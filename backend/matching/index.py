@@ -0,0 +1,90 @@
+'''
+Business: Skill-based matching - best candidates for a job and best jobs for a jobseeker
+Args: event with queryStringParameters job_id or user_id, optional limit
+Returns: HTTP response with ids ranked by score and the share of the maximum possible score
+'''
+from typing import Dict, Any, List, Tuple
+
+from shared import db
+from shared import instrumentation
+from shared import matching
+from shared import pagination
+from shared import query_builder
+from shared import runtime
+
+JOB_PROFILE_QUERY = 'SELECT skill_ids, required FROM matching_job_profiles WHERE job_id = %s AND active'
+USER_PROFILE_QUERY = 'SELECT skill_ids, levels FROM matching_user_profiles WHERE user_id = %s AND active'
+JOB_REQUIRED_QUERY = 'SELECT job_id, required FROM matching_job_profiles WHERE job_id = ANY(%s)'
+
+PREFLIGHT = runtime.preflight('GET, OPTIONS', 'Content-Type, X-Read-Primary')
+JOB_NOT_FOUND = runtime.error(404, 'Active job not found')
+JOBSEEKER_NOT_FOUND = runtime.error(404, 'Active jobseeker not found')
+
+@instrumentation.instrument('matching')
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+    
+    if method == 'OPTIONS':
+        return runtime.static(PREFLIGHT)
+    
+    if method != 'GET':
+        return runtime.static(runtime.METHOD_NOT_ALLOWED)
+    
+    params = event.get('queryStringParameters') or {}
+    try:
+        limit = pagination.parse_limit(params.get('limit'))
+        if params.get('job_id'):
+            owner = ('job_id', query_builder.integer(params['job_id']))
+        elif params.get('user_id'):
+            owner = ('user_id', query_builder.integer(params['user_id']))
+        else:
+            raise ValueError('job_id or user_id is required')
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    try:
+        with db.read_connection(event) as conn:
+            cursor = runtime.dict_cursor(conn)
+            index = matching.get_index()
+            index.refresh(cursor)
+            if owner[0] == 'job_id':
+                items = match_candidates(cursor, index, owner[1], limit)
+            else:
+                items = match_jobs(cursor, index, owner[1], limit)
+            cursor.close()
+        
+        if items is None:
+            return runtime.static(JOB_NOT_FOUND if owner[0] == 'job_id' else JOBSEEKER_NOT_FOUND)
+        
+        return runtime.json_response(200, {owner[0]: owner[1], 'items': items})
+    except Exception as e:
+        return runtime.error(500, str(e))
+
+def match_candidates(cursor: Any, index: matching.MatchingIndex, job_id: int, limit: int) -> Any:
+    cursor.execute(JOB_PROFILE_QUERY, (job_id,))
+    profile = cursor.fetchone()
+    if not profile:
+        return None
+    
+    best = matching.max_score(profile['required']) or 1
+    ranked = index.top_candidates(profile['skill_ids'], profile['required'], limit)
+    return [
+        {'user_id': user_id, 'score': score, 'match': round(score / best, 3)}
+        for user_id, score in ranked
+    ]
+
+def match_jobs(cursor: Any, index: matching.MatchingIndex, user_id: int, limit: int) -> Any:
+    cursor.execute(USER_PROFILE_QUERY, (user_id,))
+    profile = cursor.fetchone()
+    if not profile:
+        return None
+    
+    ranked: List[Tuple[int, int]] = index.top_jobs(profile['skill_ids'], profile['levels'], limit)
+    best: Dict[int, int] = {}
+    if ranked:
+        cursor.execute(JOB_REQUIRED_QUERY, ([job_id for job_id, _ in ranked],))
+        best = {row['job_id']: matching.max_score(row['required']) for row in cursor.fetchall()}
+    return [
+        {'job_id': job_id, 'score': score, 'match': round(score / (best.get(job_id) or score), 3)}
+        for job_id, score in ranked
+    ]
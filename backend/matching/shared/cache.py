@@ -0,0 +1,46 @@
+'''
+Business: Per-container TTL cache for pre-serialized response bodies with version-based invalidation
+Args: cache key, data version read from the database, cached value (serialized body, ETag)
+Returns: cached value while the version matches and the TTL has not expired
+'''
+import threading
+import time
+from typing import Any, Dict, Optional
+
+class CacheEntry:
+    __slots__ = ('version', 'expires_at', 'value')
+
+    def __init__(self, version: Any, expires_at: float, value: Any):
+        self.version = version
+        self.expires_at = expires_at
+        self.value = value
+
+class VersionedCache:
+    '''
+    Entries live for at most ttl seconds and are ignored as soon as the caller
+    reports a different data version, so writers only need to bump the version.
+    '''
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version: Any) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version or entry.expires_at <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: str, version: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(version, time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
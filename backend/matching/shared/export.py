@@ -0,0 +1,137 @@
+'''
+Business: Streaming exports - rows from a server-side named cursor written as NDJSON or CSV in fixed-size chunks
+Args: connection inside a transaction, SQL with its parameters, export format, object name prefix
+Returns: stored export metadata - download URL, row count and size in bytes
+'''
+import io
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from shared import serializer
+
+EXPORT_DIR = os.environ.get('EXPORT_DIR', '')
+EXPORT_BASE_URL = os.environ.get('EXPORT_BASE_URL', '')
+EXPORT_CHUNK_ROWS = int(os.environ.get('EXPORT_CHUNK_ROWS', '2000'))
+FORMATS = ('csv', 'ndjson')
+
+def parse_format(raw: Optional[str]) -> str:
+    if raw not in FORMATS:
+        raise ValueError(f"Invalid export format: {raw} (expected {' or '.join(FORMATS)})")
+    return raw
+
+class LocalStore:
+    '''
+    Object-store stand-in: objects are files under root and URLs are base_url + key
+    (file:// URIs when no base URL is configured). Objects appear only once complete.
+    '''
+
+    def __init__(self, root: str, base_url: str = ''):
+        self.root = root
+        self.base_url = base_url
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[BinaryIO]:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = path + '.part'
+        try:
+            with open(partial, 'wb') as output:
+                yield output
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+
+    def url(self, key: str) -> str:
+        if self.base_url:
+            return self.base_url.rstrip('/') + '/' + key
+        import pathlib
+
+        return pathlib.Path(self.path(key)).as_uri()
+
+_store: Optional[LocalStore] = None
+
+def get_store() -> LocalStore:
+    '''EXPORT_DIR defaults to <tmp>/exports; tempfile is only imported by the first export.'''
+    global _store
+    if _store is None:
+        import tempfile
+
+        _store = LocalStore(EXPORT_DIR or os.path.join(tempfile.gettempdir(), 'exports'), EXPORT_BASE_URL)
+    return _store
+
+def iter_chunks(conn: Any, query: str, params: Sequence[Any],
+                chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[Tuple[List[str], List[Any]]]:
+    '''
+    Fetch through a named (server-side) cursor, chunk_rows at a time, so only one chunk is
+    ever held in memory. Needs an open transaction, which pooled connections always have.
+    Yields (column names, rows); the first chunk is yielded even when it is empty, so an
+    export that matches nothing still knows its columns.
+    '''
+    from psycopg2.extras import RealDictCursor
+
+    cursor = conn.cursor(name=f'export_{os.urandom(8).hex()}', cursor_factory=RealDictCursor)
+    cursor.itersize = chunk_rows
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchmany(chunk_rows)
+        columns = [column[0] for column in cursor.description]
+        yield columns, rows
+        while rows:
+            rows = cursor.fetchmany(chunk_rows)
+            if rows:
+                yield columns, rows
+    finally:
+        cursor.close()
+
+def csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return serializer.dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def encode_ndjson(columns: List[str], rows: List[Any], first: bool) -> bytes:
+    return ''.join(serializer.dumps(row) + '\n' for row in rows).encode('utf-8')
+
+def encode_csv(columns: List[str], rows: List[Any], first: bool) -> bytes:
+    import csv
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if first:
+        writer.writerow(columns)
+    writer.writerows([csv_value(value) for value in row.values()] for row in rows)
+    return buffer.getvalue().encode('utf-8')
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson}
+
+def export(conn: Any, query: str, params: Sequence[Any], fmt: str, prefix: str) -> Dict[str, Any]:
+    key = f"{prefix}/{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{os.urandom(6).hex()}.{fmt}"
+    encode = ENCODERS[fmt]
+    store = get_store()
+    rows_written = 0
+    bytes_written = 0
+    with store.open(key) as output:
+        for index, (columns, rows) in enumerate(iter_chunks(conn, query, params)):
+            data = encode(columns, rows, index == 0)
+            output.write(data)
+            rows_written += len(rows)
+            bytes_written += len(data)
+    return {
+        'url': store.url(key),
+        'key': key,
+        'format': fmt,
+        'rows': rows_written,
+        'bytes': bytes_written
+    }
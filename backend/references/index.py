@@ -3,96 +3,104 @@ Business: Manage reference data - categories, industries, cities, countries, ski
 Args: event with httpMethod, queryStringParameters
 Returns: HTTP response with reference data
 '''
-import json
 import os
 from typing import Dict, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
 
-def get_db_connection():
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn)
+from shared import db
+from shared import http_cache
+from shared import instrumentation
+from shared import runtime
+from shared import serializer
+from shared.cache import VersionedCache
 
+REFERENCE_TYPES = (
+    'all', 'categories', 'industries', 'countries', 'cities',
+    'skills', 'education_levels', 'companies'
+)
+
+reference_cache = VersionedCache(float(os.environ.get('REFERENCES_CACHE_TTL', '300')))
+
+PREFLIGHT = runtime.preflight('GET, POST, PUT, OPTIONS', 'Content-Type, If-None-Match, X-Read-Primary')
+
+@instrumentation.instrument('references')
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return runtime.static(PREFLIGHT)
     
     try:
         params = event.get('queryStringParameters') or {}
         ref_type = params.get('type', 'all')
+        cacheable = ref_type in REFERENCE_TYPES
         
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        result = {}
-        
-        if ref_type in ['all', 'categories']:
-            cursor.execute('SELECT * FROM categories WHERE active = true ORDER BY name')
-            result['categories'] = [dict(row) for row in cursor.fetchall()]
-        
-        if ref_type in ['all', 'industries']:
-            cursor.execute('SELECT * FROM industries WHERE active = true ORDER BY name')
-            result['industries'] = [dict(row) for row in cursor.fetchall()]
-        
-        if ref_type in ['all', 'countries']:
-            cursor.execute('SELECT * FROM countries ORDER BY name')
-            result['countries'] = [dict(row) for row in cursor.fetchall()]
-        
-        if ref_type in ['all', 'cities']:
-            cursor.execute('''
-                SELECT c.*, ct.name as country_name 
-                FROM cities c
-                JOIN countries ct ON c.country_id = ct.id
-                ORDER BY c.name
-            ''')
-            result['cities'] = [dict(row) for row in cursor.fetchall()]
-        
-        if ref_type in ['all', 'skills']:
-            cursor.execute('SELECT * FROM skills ORDER BY name')
-            result['skills'] = [dict(row) for row in cursor.fetchall()]
-        
-        if ref_type in ['all', 'education_levels']:
-            cursor.execute('SELECT * FROM education_levels ORDER BY id')
-            result['education_levels'] = [dict(row) for row in cursor.fetchall()]
+        with db.read_connection(event) as conn:
+            cursor = runtime.dict_cursor(conn)
+            cursor.execute('SELECT version FROM reference_data_version WHERE id = 1')
+            version_row = cursor.fetchone()
+            version = version_row['version'] if version_row else None
+            
+            cached = reference_cache.get(ref_type, version) if cacheable else None
+            cache_status = 'HIT' if cached is not None else 'MISS'
+            if cached is None:
+                body = serializer.dumps(load_reference_data(cursor, ref_type))
+                etag = http_cache.body_etag(body)
+                if cacheable:
+                    reference_cache.put(ref_type, version, (body, etag))
+            else:
+                body, etag = cached
+            cursor.close()
         
-        if ref_type in ['all', 'companies']:
-            cursor.execute('''
-                SELECT c.*, 
-                       i.name as industry_name,
-                       ci.name as city_name
-                FROM companies c
-                LEFT JOIN industries i ON c.industry_id = i.id
-                LEFT JOIN cities ci ON c.city_id = ci.id
-                ORDER BY c.name
-            ''')
-            result['companies'] = [dict(row) for row in cursor.fetchall()]
+        if http_cache.is_not_modified(event, etag):
+            return http_cache.not_modified_response(etag, http_cache.REFERENCES_CACHE_CONTROL)
         
-        cursor.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(result, default=str),
-            'isBase64Encoded': False
-        }
+        return runtime.response(200, body, {**runtime.JSON_HEADERS, 'X-Cache': cache_status, **http_cache.cache_headers(etag, http_cache.REFERENCES_CACHE_CONTROL)})
         
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
+        return runtime.error(500, str(e))
+
+def load_reference_data(cursor: Any, ref_type: str) -> Dict[str, Any]:
+    result = {}
+    
+    if ref_type in ['all', 'categories']:
+        cursor.execute('SELECT * FROM categories WHERE active = true ORDER BY name')
+        result['categories'] = cursor.fetchall()
+    
+    if ref_type in ['all', 'industries']:
+        cursor.execute('SELECT * FROM industries WHERE active = true ORDER BY name')
+        result['industries'] = cursor.fetchall()
+    
+    if ref_type in ['all', 'countries']:
+        cursor.execute('SELECT * FROM countries ORDER BY name')
+        result['countries'] = cursor.fetchall()
+    
+    if ref_type in ['all', 'cities']:
+        cursor.execute('''
+            SELECT c.*, ct.name as country_name 
+            FROM cities c
+            JOIN countries ct ON c.country_id = ct.id
+            ORDER BY c.name
+        ''')
+        result['cities'] = cursor.fetchall()
+    
+    if ref_type in ['all', 'skills']:
+        cursor.execute('SELECT * FROM skills ORDER BY name')
+        result['skills'] = cursor.fetchall()
+    
+    if ref_type in ['all', 'education_levels']:
+        cursor.execute('SELECT * FROM education_levels ORDER BY id')
+        result['education_levels'] = cursor.fetchall()
+    
+    if ref_type in ['all', 'companies']:
+        cursor.execute('''
+            SELECT c.*, 
+                   i.name as industry_name,
+                   ci.name as city_name
+            FROM companies c
+            LEFT JOIN industries i ON c.industry_id = i.id
+            LEFT JOIN cities ci ON c.city_id = ci.id
+            ORDER BY c.name
+        ''')
+        result['companies'] = cursor.fetchall()
+    
+    return result
\ No newline at end of file
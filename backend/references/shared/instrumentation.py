@@ -0,0 +1,175 @@
+'''
+Business: Opt-in per-invocation performance tracing - connect, query, serialization timings as one JSON log line
+Args: PERF_LOG=1 to log, PERF_SERVER_TIMING=1 for a Server-Timing header; SLOW_QUERY_MS alone only traces cursors
+Returns: instrument() handler decorator, span() timer and a traced connection class for the connection pool
+'''
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from shared import query_builder
+from shared import slow_queries
+
+PERF_LOG = os.environ.get('PERF_LOG') == '1'
+SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING') == '1'
+ENABLED = PERF_LOG or SERVER_TIMING
+TRACE_QUERIES = ENABLED or slow_queries.ENABLED
+SQL_PREVIEW_CHARS = 160
+
+_local = threading.local()
+
+class Trace:
+    __slots__ = ('function', 'started', 'queries', 'spans')
+
+    def __init__(self, function: str):
+        self.function = function
+        self.started = time.perf_counter()
+        self.queries: List[Dict[str, Any]] = []
+        self.spans: Dict[str, float] = {}
+
+    def add_query(self, query: Any, duration_ms: float, rows: int) -> None:
+        self.queries.append({'sql': sql_preview(query), 'ms': round(duration_ms, 3), 'rows': rows})
+
+    def add_span(self, name: str, duration_ms: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration_ms
+
+    def db_ms(self) -> float:
+        return sum(query['ms'] for query in self.queries)
+
+def current() -> Optional[Trace]:
+    return getattr(_local, 'trace', None)
+
+def query_text(query: Any, conn: Any = None) -> str:
+    '''SQL text of an execute() argument; EXECUTE of a query_builder statement maps back to its source.'''
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif hasattr(query, 'as_string'):
+        query = query.as_string(conn)
+    query = str(query)
+    return query_builder.statement_source(query) or query
+
+def sql_preview(query: Any) -> str:
+    return re.sub(r'\s+', ' ', query_text(query)).strip()[:SQL_PREVIEW_CHARS]
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    '''Add the block's wall time to the current trace under name; callers guard with ENABLED.'''
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = current()
+        if trace is not None:
+            trace.add_span(name, (time.perf_counter() - started) * 1000)
+
+class TracedCursorMixin:
+    def execute(self, query: Any, vars: Any = None) -> Any:
+        trace = current()
+        if trace is None and not slow_queries.ENABLED:
+            return super().execute(query, vars)
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if trace is not None:
+                trace.add_query(query, duration_ms, self.rowcount)
+        if slow_queries.ENABLED and duration_ms >= slow_queries.SLOW_QUERY_MS:
+            slow_queries.capture(
+                getattr(self.connection, 'source_dsn', None), query_text(query, self.connection), vars,
+                duration_ms, self.rowcount, trace.function if trace is not None else None
+            )
+        return result
+
+_traced_cursor_classes: Dict[type, type] = {}
+
+def traced_cursor_class(factory: type) -> type:
+    traced = _traced_cursor_classes.get(factory)
+    if traced is None:
+        traced = type(f'Traced{factory.__name__}', (TracedCursorMixin, factory), {})
+        _traced_cursor_classes[factory] = traced
+    return traced
+
+_traced_connection_class: Optional[type] = None
+
+def traced_connection_class() -> type:
+    '''
+    Connection class whose cursors, whatever cursor_factory the handler asks for, time
+    execute(). Built on first use so importing this module does not load psycopg2.
+    '''
+    global _traced_connection_class
+    if _traced_connection_class is None:
+        import psycopg2.extensions
+
+        class TracedConnection(psycopg2.extensions.connection):
+            def __init__(self, dsn: str, *args: Any, **kwargs: Any):
+                super().__init__(dsn, *args, **kwargs)
+                self.source_dsn = dsn
+
+            def cursor(self, *args: Any, **kwargs: Any) -> Any:
+                factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+                kwargs['cursor_factory'] = traced_cursor_class(factory)
+                return super().cursor(*args, **kwargs)
+
+        _traced_connection_class = TracedConnection
+    return _traced_connection_class
+
+def server_timing(trace: Trace, total_ms: float) -> str:
+    metrics = [('db', trace.db_ms())] + list(trace.spans.items()) + [('total', total_ms)]
+    return ', '.join(f'{name};dur={duration:.1f}' for name, duration in metrics)
+
+def log_line(trace: Trace, event: Dict[str, Any], response: Dict[str, Any], total_ms: float) -> str:
+    body = response.get('body') or ''
+    return json.dumps({
+        'event': 'perf',
+        'function': trace.function,
+        'method': event.get('httpMethod', 'GET'),
+        'params': sorted((event.get('queryStringParameters') or {}).keys()),
+        'status': response.get('statusCode'),
+        'total_ms': round(total_ms, 3),
+        'connect_ms': round(trace.spans.get('connect', 0.0), 3),
+        'db_ms': round(trace.db_ms(), 3),
+        'serialize_ms': round(trace.spans.get('serialize', 0.0), 3),
+        'query_count': len(trace.queries),
+        'queries': trace.queries,
+        'response_bytes': len(body.encode('utf-8')) if isinstance(body, str) else len(body)
+    }, ensure_ascii=False)
+
+def instrument(function: str) -> Callable[[Callable[..., Dict[str, Any]]], Callable[..., Dict[str, Any]]]:
+    '''
+    Wrap a handler so each invocation is traced. With PERF_LOG and PERF_SERVER_TIMING both
+    off the handler is returned unchanged, so disabled tracing costs nothing per request.
+    '''
+    def decorate(handler: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        if not ENABLED:
+            return handler
+
+        @functools.wraps(handler)
+        def traced(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            trace = Trace(function)
+            previous = current()
+            _local.trace = trace
+            try:
+                response = handler(event, context)
+            finally:
+                _local.trace = previous
+            total_ms = (time.perf_counter() - trace.started) * 1000
+
+            if SERVER_TIMING:
+                response['headers'] = {
+                    **(response.get('headers') or {}),
+                    'Server-Timing': server_timing(trace, total_ms),
+                    'Timing-Allow-Origin': '*'
+                }
+            if PERF_LOG:
+                print(log_line(trace, event, response, total_ms), flush=True)
+            return response
+
+        return traced
+
+    return decorate
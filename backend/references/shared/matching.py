@@ -0,0 +1,254 @@
+'''
+Business: In-memory candidate/job matching index - per-skill bitmaps over user and job ids with bit-sliced scoring
+Args: RealDictCursor for loading matching_*_profiles, the skill profile of a job or jobseeker, K
+Returns: top-K (id, score) pairs computed without joining the skill link tables
+'''
+import datetime
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+REQUIRED_WEIGHT = int(os.environ.get('MATCHING_REQUIRED_WEIGHT', '4'))
+OPTIONAL_WEIGHT = int(os.environ.get('MATCHING_OPTIONAL_WEIGHT', '1'))
+REFRESH_INTERVAL = float(os.environ.get('MATCHING_REFRESH_INTERVAL', '2'))
+REFRESH_OVERLAP = datetime.timedelta(seconds=float(os.environ.get('MATCHING_REFRESH_OVERLAP', '30')))
+FULL_RELOAD_INTERVAL = float(os.environ.get('MATCHING_FULL_RELOAD_INTERVAL', '900'))
+MAX_INCREMENTAL_ROWS = int(os.environ.get('MATCHING_MAX_INCREMENTAL_ROWS', '5000'))
+LEVELS = (1, 2, 3)
+
+USER_POSTINGS_QUERY = '''
+    SELECT s.skill_id, s.level, array_agg(p.user_id) as owner_ids
+    FROM matching_user_profiles p, unnest(p.skill_ids, p.levels) AS s(skill_id, level)
+    WHERE p.active
+    GROUP BY s.skill_id, s.level
+'''
+JOB_POSTINGS_QUERY = '''
+    SELECT s.skill_id, s.required, array_agg(p.job_id) as owner_ids
+    FROM matching_job_profiles p, unnest(p.skill_ids, p.required) AS s(skill_id, required)
+    WHERE p.active
+    GROUP BY s.skill_id, s.required
+'''
+USER_CHANGES_QUERY = '''
+    SELECT user_id as owner_id, skill_ids, levels as classes, active
+    FROM matching_user_profiles
+    WHERE refreshed_at > %s
+    LIMIT %s
+'''
+JOB_CHANGES_QUERY = '''
+    SELECT job_id as owner_id, skill_ids, required as classes, active
+    FROM matching_job_profiles
+    WHERE refreshed_at > %s
+    LIMIT %s
+'''
+
+Key = Tuple[int, Any]
+
+def skill_weight(required: bool, level: int) -> int:
+    '''A required skill outweighs any number of optional ones; proficiency adds up to 2 on top.'''
+    return (REQUIRED_WEIGHT if required else OPTIONAL_WEIGHT) + max(1, min(int(level or 1), LEVELS[-1])) - 1
+
+def max_score(required: Sequence[bool]) -> int:
+    return sum(skill_weight(flag, LEVELS[-1]) for flag in required)
+
+def bitmap(ids: Sequence[int]) -> int:
+    '''Set of non-negative ids as an int with bit id set; built through a bytearray in one pass.'''
+    if not ids:
+        return 0
+    bits = bytearray(max(ids) // 8 + 1)
+    for owner_id in ids:
+        bits[owner_id >> 3] |= 1 << (owner_id & 7)
+    return int.from_bytes(bits, 'little')
+
+def iter_bits(value: int) -> Iterator[int]:
+    while value:
+        lowest = value & -value
+        yield lowest.bit_length() - 1
+        value ^= lowest
+
+class ScoreSlices:
+    '''
+    Bit-sliced score accumulator: slices[i] holds bit i of every owner's score, so adding
+    weight * bitmap is a ripple-carry add over whole ints and scores all owners at once.
+    '''
+
+    def __init__(self):
+        self.slices: List[int] = []
+
+    def add(self, members: int, weight: int) -> None:
+        position = 0
+        while weight:
+            if weight & 1:
+                self._add_at(position, members)
+            weight >>= 1
+            position += 1
+
+    def _add_at(self, position: int, carry: int) -> None:
+        while carry:
+            while position >= len(self.slices):
+                self.slices.append(0)
+            current = self.slices[position]
+            self.slices[position] = current ^ carry
+            carry = current & carry
+            position += 1
+
+    def score(self, owner_id: int) -> int:
+        return sum(1 << position for position, bits in enumerate(self.slices) if bits >> owner_id & 1)
+
+    def top(self, k: int) -> List[Tuple[int, int]]:
+        '''
+        Top-k by walking the slices from the most significant bit: owners known to be above
+        the cut accumulate in greater, ties at the cut stay in equal. Ties fill by lowest id.
+        '''
+        equal = 0
+        for bits in self.slices:
+            equal |= bits
+        greater = 0
+        for bits in reversed(self.slices):
+            candidates = greater | (equal & bits)
+            count = candidates.bit_count()
+            if count > k:
+                equal &= bits
+            elif count < k:
+                greater = candidates
+                equal &= ~bits
+            else:
+                greater = candidates
+                equal = 0
+                break
+
+        selected = list(iter_bits(greater))
+        if len(selected) < k:
+            for owner_id in iter_bits(equal & ~greater):
+                selected.append(owner_id)
+                if len(selected) == k:
+                    break
+        ranked = [(owner_id, self.score(owner_id)) for owner_id in selected]
+        ranked.sort(key=lambda pair: (-pair[1], pair[0]))
+        return ranked
+
+class Postings:
+    '''
+    Skill class -> bitmap of owners. Updates build a new dict and swap it in, so readers
+    that took a reference keep a consistent snapshot without holding a lock.
+    '''
+
+    def __init__(self, bitmaps: Dict[Key, int]):
+        self.bitmaps = bitmaps
+
+    def apply(self, changes: List[Tuple[int, List[Key]]]) -> None:
+        '''Replace the listed owners' keys; an owner with no keys drops out of every bitmap.'''
+        cleared = bitmap([owner_id for owner_id, _ in changes])
+        grouped: Dict[Key, List[int]] = {}
+        for owner_id, keys in changes:
+            for key in keys:
+                grouped.setdefault(key, []).append(owner_id)
+        added = {key: bitmap(owner_ids) for key, owner_ids in grouped.items()}
+
+        bitmaps = {}
+        for key, members in self.bitmaps.items():
+            if members & cleared:
+                members &= ~cleared
+            members |= added.pop(key, 0)
+            if members:
+                bitmaps[key] = members
+        bitmaps.update(added)
+        self.bitmaps = bitmaps
+
+class MatchingIndex:
+    '''
+    Candidate bitmaps keyed (skill_id, level) and job bitmaps keyed (skill_id, required).
+    refresh() loads everything once, then re-reads only profiles whose refreshed_at moved
+    since the last poll (minus REFRESH_OVERLAP for transactions that committed late).
+    '''
+
+    def __init__(self):
+        self.users = Postings({})
+        self.jobs = Postings({})
+        self.watermark: Any = None
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+        self.full_reloads = 0
+        self.incremental_rows = 0
+        self._lock = threading.Lock()
+
+    def refresh_due(self) -> bool:
+        return self.watermark is None or time.monotonic() - self.checked_at >= REFRESH_INTERVAL
+
+    def refresh(self, cursor: Any) -> None:
+        if not self.refresh_due():
+            return
+        if not self._lock.acquire(blocking=self.watermark is None):
+            return
+        try:
+            if not self.refresh_due():
+                return
+            cursor.execute('SELECT now() as now')
+            now = cursor.fetchone()['now']
+            if self.watermark is None or time.monotonic() - self.loaded_at >= FULL_RELOAD_INTERVAL \
+                    or not self._apply_changes(cursor):
+                self._reload(cursor)
+            self.watermark = now
+            self.checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _reload(self, cursor: Any) -> None:
+        cursor.execute(USER_POSTINGS_QUERY)
+        users = {(row['skill_id'], row['level']): bitmap(row['owner_ids']) for row in cursor.fetchall()}
+        cursor.execute(JOB_POSTINGS_QUERY)
+        jobs = {(row['skill_id'], row['required']): bitmap(row['owner_ids']) for row in cursor.fetchall()}
+        self.users = Postings(users)
+        self.jobs = Postings(jobs)
+        self.loaded_at = time.monotonic()
+        self.full_reloads += 1
+
+    def _apply_changes(self, cursor: Any) -> bool:
+        '''False when too many profiles changed for an incremental pass to beat a reload.'''
+        since = self.watermark - REFRESH_OVERLAP
+        for postings, query in ((self.users, USER_CHANGES_QUERY), (self.jobs, JOB_CHANGES_QUERY)):
+            cursor.execute(query, (since, MAX_INCREMENTAL_ROWS + 1))
+            rows = cursor.fetchall()
+            if len(rows) > MAX_INCREMENTAL_ROWS:
+                return False
+            if rows:
+                postings.apply([
+                    (row['owner_id'], list(zip(row['skill_ids'], row['classes'])) if row['active'] else [])
+                    for row in rows
+                ])
+                self.incremental_rows += len(rows)
+        return True
+
+    def top_candidates(self, skill_ids: Sequence[int], required: Sequence[bool], k: int) -> List[Tuple[int, int]]:
+        bitmaps = self.users.bitmaps
+        slices = ScoreSlices()
+        for skill_id, flag in zip(skill_ids, required):
+            for level in LEVELS:
+                members = bitmaps.get((skill_id, level))
+                if members:
+                    slices.add(members, skill_weight(flag, level))
+        return slices.top(k)
+
+    def top_jobs(self, skill_ids: Sequence[int], levels: Sequence[int], k: int) -> List[Tuple[int, int]]:
+        bitmaps = self.jobs.bitmaps
+        slices = ScoreSlices()
+        for skill_id, level in zip(skill_ids, levels):
+            for flag in (True, False):
+                members = bitmaps.get((skill_id, flag))
+                if members:
+                    slices.add(members, skill_weight(flag, level))
+        return slices.top(k)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'user_bitmaps': len(self.users.bitmaps),
+            'job_bitmaps': len(self.jobs.bitmaps),
+            'full_reloads': self.full_reloads,
+            'incremental_rows': self.incremental_rows,
+            'watermark': self.watermark.isoformat() if hasattr(self.watermark, 'isoformat') else self.watermark
+        }
+
+_index = MatchingIndex()
+
+def get_index() -> MatchingIndex:
+    return _index
@@ -0,0 +1,278 @@
+'''
+Business: Local single-process server - mounts every function's handler(event, context) under /<function> over HTTP/1.1
+Args: --host, --port, --functions, --threads (blocking handler pool), --max-pending, --workers (forked processes)
+Returns: nothing; serves until SIGINT/SIGTERM, one JSON access-log line per request with --access-log
+'''
+import argparse
+import asyncio
+import base64
+import http
+import importlib.util
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 75.0
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+Handler = Callable[[Dict[str, Any], Any], Dict[str, Any]]
+
+class BadRequest(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+def discover_functions() -> List[str]:
+    return sorted(
+        name for name in os.listdir(BACKEND_DIR)
+        if os.path.isfile(os.path.join(BACKEND_DIR, name, 'index.py'))
+    )
+
+def load_handler(name: str) -> Handler:
+    '''Import backend/<name>/index.py under a unique module name; backend/shared is one instance for all.'''
+    path = os.path.join(BACKEND_DIR, name, 'index.py')
+    spec = importlib.util.spec_from_file_location(f'{name}_index', path)
+    module: ModuleType = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.handler
+
+def json_response(status_code: int, data: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(data),
+        'isBase64Encoded': False
+    }
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+    '''(method, target, version, headers, body) or None when the client closed the connection.'''
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise BadRequest(400, 'Incomplete request head')
+    except asyncio.LimitOverrunError:
+        raise BadRequest(431, 'Request header fields too large')
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ', 2)
+    except ValueError:
+        raise BadRequest(400, 'Malformed request line')
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(':')
+        if not separator:
+            raise BadRequest(400, 'Malformed header line')
+        name = name.strip()
+        value = value.strip()
+        headers[name] = f'{headers[name]}, {value}' if name in headers else value
+
+    lowered = {name.lower(): value for name, value in headers.items()}
+    if 'chunked' in lowered.get('transfer-encoding', '').lower():
+        raise BadRequest(411, 'Chunked request bodies are not supported; send Content-Length')
+    try:
+        length = int(lowered.get('content-length', '0'))
+    except ValueError:
+        raise BadRequest(400, 'Invalid Content-Length')
+    if length > MAX_BODY_BYTES:
+        raise BadRequest(413, 'Request body too large')
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, version, headers, body
+
+def build_event(method: str, target: str, headers: Dict[str, str], body: bytes,
+                peer: str, request_id: str) -> Tuple[str, Dict[str, Any]]:
+    '''Translate an HTTP request into (function name, event) in the cloud function event format.'''
+    url = urlsplit(target)
+    _, _, rest = url.path.partition('/')
+    function, _, subpath = rest.partition('/')
+    try:
+        text_body, encoded = body.decode('utf-8'), False
+    except UnicodeDecodeError:
+        text_body, encoded = base64.b64encode(body).decode('ascii'), True
+    return function, {
+        'httpMethod': method,
+        'path': '/' + subpath,
+        'headers': headers,
+        'queryStringParameters': dict(parse_qsl(url.query, keep_blank_values=True)),
+        'body': text_body,
+        'isBase64Encoded': encoded,
+        'requestContext': {'requestId': request_id, 'identity': {'sourceIp': peer}}
+    }
+
+def encode_response(response: Dict[str, Any], keep_alive: bool, head_only: bool) -> bytes:
+    status_code = int(response.get('statusCode', 200))
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded'):
+        payload = base64.b64decode(body)
+    else:
+        payload = body.encode('utf-8') if isinstance(body, str) else bytes(body)
+    try:
+        reason = http.HTTPStatus(status_code).phrase
+    except ValueError:
+        reason = ''
+
+    lines = [f'HTTP/1.1 {status_code} {reason}']
+    for name, value in (response.get('headers') or {}).items():
+        if name.lower() not in ('content-length', 'connection', 'transfer-encoding'):
+            lines.append(f'{name}: {value}')
+    lines.append(f'Content-Length: {len(payload)}')
+    lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    return head if head_only else head + payload
+
+class Server:
+    '''
+    asyncio front end: parses HTTP/1.1 on the event loop, runs the blocking handler on a
+    bounded thread pool sized like the database pool, and sheds load with 503 once
+    max_pending invocations are queued or running.
+    '''
+
+    def __init__(self, handlers: Dict[str, Handler], threads: int, max_pending: int, access_log: bool):
+        self.handlers = handlers
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='handler')
+        self.max_pending = max_pending
+        self.access_log = access_log
+        self.pending = 0
+        self.served = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = (writer.get_extra_info('peername') or ('', 0))[0]
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except BadRequest as e:
+                    writer.write(encode_response(json_response(e.status_code, {'error': str(e)}), False, False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+
+                method, target, version, headers, body = request
+                connection = next((value for name, value in headers.items() if name.lower() == 'connection'), '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                started = time.perf_counter()
+                response = await self.dispatch(method, target, headers, body, peer)
+                writer.write(encode_response(response, keep_alive, method == 'HEAD'))
+                await writer.drain()
+                self.served += 1
+                if self.access_log:
+                    print(json.dumps({
+                        'event': 'access', 'method': method, 'target': target,
+                        'status': response.get('statusCode'), 'ms': round((time.perf_counter() - started) * 1000, 3)
+                    }), flush=True)
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes, peer: str) -> Dict[str, Any]:
+        function, event = build_event(method, target, headers, body, peer, os.urandom(8).hex())
+        handler = self.handlers.get(function)
+        if handler is None:
+            return json_response(404, {'error': f'Unknown function: {function}', 'functions': sorted(self.handlers)})
+        if self.pending >= self.max_pending:
+            return json_response(503, {'error': 'Server busy'})
+
+        context = SimpleNamespace(function_name=function, request_id=event['requestContext']['requestId'])
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, handler, event, context)
+        except Exception as e:
+            return json_response(500, {'error': str(e)})
+        finally:
+            self.pending -= 1
+
+async def serve(sock: socket.socket, server: Server) -> None:
+    listener = await asyncio.start_server(server.handle_connection, sock=sock, limit=MAX_HEADER_BYTES)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with listener:
+        await stop.wait()
+    server.executor.shutdown(wait=True)
+
+def run_worker(sock: socket.socket, args: argparse.Namespace) -> None:
+    '''Handlers (and their connection pools) are loaded per worker, after any fork.'''
+    os.environ.setdefault('DB_POOL_MAX_SIZE', str(args.threads))
+    handlers = {name: load_handler(name) for name in args.functions}
+    server = Server(handlers, args.threads, args.max_pending, args.access_log)
+    asyncio.run(serve(sock, server))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--functions', default='', help='comma separated functions to mount (default: all)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+                        help='handler threads per worker; also the default database pool size')
+    parser.add_argument('--max-pending', type=int, default=256, help='queued plus running invocations before 503')
+    parser.add_argument('--workers', type=int, default=1, help='forked worker processes sharing the socket')
+    parser.add_argument('--access-log', action='store_true')
+    args = parser.parse_args()
+
+    available = discover_functions()
+    args.functions = [name.strip() for name in args.functions.split(',') if name.strip()] or available
+    unknown = [name for name in args.functions if name not in available]
+    if unknown:
+        parser.error(f"unknown functions: {', '.join(unknown)}")
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    print(json.dumps({
+        'event': 'listening', 'host': args.host, 'port': sock.getsockname()[1],
+        'functions': args.functions, 'workers': args.workers, 'threads': args.threads
+    }), flush=True)
+    if args.workers <= 1:
+        run_worker(sock, args)
+        return
+
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(sock, args)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            os._exit(code)
+        children.append(pid)
+
+    def forward(signum: int, frame: Any) -> None:
+        for child in children:
+            try:
+                os.kill(child, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+    for child in children:
+        os.waitpid(child, 0)
+    sock.close()
+
+if __name__ == '__main__':
+    main()
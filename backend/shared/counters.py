@@ -0,0 +1,63 @@
+'''
+Business: Deferred denormalized counters - jobs.applications_count and jobs.views_count
+Args: job id on write, RealDictCursor for the periodic fold and flush
+Returns: shard number for an increment; number of jobs updated by a fold or flush
+'''
+import os
+import random
+from typing import Any
+
+APPLICATION_COUNTER_SHARDS = int(os.environ.get('APPLICATION_COUNTER_SHARDS', '16'))
+
+def pick_shard() -> int:
+    return random.randrange(APPLICATION_COUNTER_SHARDS)
+
+def fold_application_counters(cursor: Any) -> int:
+    '''
+    Move pending shard deltas into jobs.applications_count in one statement. The DELETE
+    locks the drained shard rows, so concurrent folds never count a delta twice and
+    increments arriving meanwhile simply recreate their shard row.
+    '''
+    cursor.execute('''
+        WITH drained AS (
+            DELETE FROM job_application_counter_shards
+            RETURNING job_id, delta
+        ),
+        totals AS (
+            SELECT job_id, sum(delta)::int as delta
+            FROM drained
+            GROUP BY job_id
+        )
+        UPDATE jobs j
+        SET applications_count = COALESCE(j.applications_count, 0) + totals.delta
+        FROM totals
+        WHERE j.id = totals.job_id
+        RETURNING j.id
+    ''')
+    return len(cursor.fetchall())
+
+def record_job_view(cursor: Any, job_id: Any) -> None:
+    cursor.execute('INSERT INTO job_view_events (job_id) VALUES (%s)', (job_id,))
+
+def flush_job_views(cursor: Any) -> int:
+    '''
+    Drain buffered view events into jobs.views_count, one UPDATE per job per flush instead
+    of one per view. updated_at is left alone - a view is not an edit of the posting.
+    '''
+    cursor.execute('''
+        WITH drained AS (
+            DELETE FROM job_view_events
+            RETURNING job_id
+        ),
+        totals AS (
+            SELECT job_id, count(*)::int as views
+            FROM drained
+            GROUP BY job_id
+        )
+        UPDATE jobs j
+        SET views_count = COALESCE(j.views_count, 0) + totals.views
+        FROM totals
+        WHERE j.id = totals.job_id
+        RETURNING j.id
+    ''')
+    return len(cursor.fetchall())
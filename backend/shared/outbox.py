@@ -0,0 +1,92 @@
+'''
+Business: Transactional outbox for application events - batch drain that hands notifications to a delivery target
+Args: RealDictCursor on a maintenance connection, committed after every batch; OUTBOX_WEBHOOK_URL, OUTBOX_BATCH_SIZE, OUTBOX_MAX_BATCHES
+Returns: number of events delivered; failed batches are rescheduled with exponential backoff
+'''
+import os
+from typing import Any, Dict, List
+
+from shared import serializer
+
+OUTBOX_WEBHOOK_URL = os.environ.get('OUTBOX_WEBHOOK_URL', '')
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '500'))
+OUTBOX_MAX_BATCHES = int(os.environ.get('OUTBOX_MAX_BATCHES', '20'))
+OUTBOX_WEBHOOK_TIMEOUT = float(os.environ.get('OUTBOX_WEBHOOK_TIMEOUT', '10'))
+MAX_BACKOFF_SECONDS = 3600
+
+STATUS_CHANGED = 'application.status_changed'
+
+def deliver(events: List[Dict[str, Any]]) -> None:
+    '''
+    One call per batch, grouped by recipient, so fan-out cost does not grow with the number
+    of events. Without OUTBOX_WEBHOOK_URL the batch is written to the log instead.
+    '''
+    notifications: Dict[int, List[Dict[str, Any]]] = {}
+    for event in events:
+        notifications.setdefault(event['jobseeker_id'], []).append({
+            'id': event['id'],
+            'type': event['event_type'],
+            'application_id': event['application_id'],
+            'job_id': event['job_id'],
+            'payload': event['payload'],
+            'created_at': event['created_at']
+        })
+    body = serializer.dumps({
+        'event': 'notifications',
+        'recipients': [{'jobseeker_id': recipient, 'events': items} for recipient, items in notifications.items()]
+    })
+
+    if not OUTBOX_WEBHOOK_URL:
+        print(body, flush=True)
+        return
+    import urllib.request
+
+    request = urllib.request.Request(
+        OUTBOX_WEBHOOK_URL, data=body.encode('utf-8'),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=OUTBOX_WEBHOOK_TIMEOUT) as response:
+        response.read()
+
+def drain_application_outbox(cursor: Any) -> int:
+    '''
+    Claim due events with FOR UPDATE SKIP LOCKED so concurrent drains split the queue,
+    deliver them and delete them. Each batch is its own transaction, so a slow webhook holds
+    at most one batch of row locks. Delivery is at-least-once: a batch whose transaction
+    does not commit is claimed again by the next drain.
+    '''
+    conn = cursor.connection
+    delivered = 0
+    for _ in range(OUTBOX_MAX_BATCHES):
+        cursor.execute('''
+            SELECT id, application_id, job_id, jobseeker_id, event_type, payload, created_at, attempts
+            FROM application_outbox
+            WHERE available_at <= now()
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        ''', (OUTBOX_BATCH_SIZE,))
+        events = cursor.fetchall()
+        if not events:
+            break
+        event_ids = [event['id'] for event in events]
+
+        try:
+            deliver(events)
+        except Exception as e:
+            cursor.execute('''
+                UPDATE application_outbox
+                SET attempts = attempts + 1,
+                    available_at = now() + least(power(2, attempts), %s) * interval '1 second',
+                    last_error = %s
+                WHERE id = ANY(%s)
+            ''', (MAX_BACKOFF_SECONDS, str(e)[:500], event_ids))
+            conn.commit()
+            break
+
+        cursor.execute('DELETE FROM application_outbox WHERE id = ANY(%s)', (event_ids,))
+        conn.commit()
+        delivered += len(events)
+        if len(events) < OUTBOX_BATCH_SIZE:
+            break
+    return delivered
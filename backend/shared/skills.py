@@ -0,0 +1,46 @@
+'''
+Business: Set-based synchronisation of skill link tables (user_skills, job_skills)
+Args: RealDictCursor inside the caller's transaction, owner id, desired {skill_id: value} mapping
+Returns: counts of added, changed and removed links - always a single statement round trip
+'''
+from typing import Any, Dict
+
+SKILL_LINK_TABLES = {
+    'user_skills': ('user_id', 'proficiency_level', 'text'),
+    'job_skills': ('job_id', 'required', 'boolean')
+}
+
+def sync_skill_links(cursor: Any, table: str, owner_id: Any, desired: Dict[int, Any]) -> Dict[str, int]:
+    '''
+    Rows missing from desired are deleted, new ones inserted and rows whose value changed
+    updated; unchanged rows are not rewritten. Relies on the (owner, skill_id) unique index.
+    '''
+    owner_column, value_column, value_type = SKILL_LINK_TABLES[table]
+    skill_ids = list(desired)
+    values = [desired[skill_id] for skill_id in skill_ids]
+
+    cursor.execute(f'''
+        WITH desired AS (
+            SELECT * FROM unnest(%s::int[], %s::{value_type}[]) AS d(skill_id, value)
+        ),
+        removed AS (
+            DELETE FROM {table} t
+            WHERE t.{owner_column} = %s
+              AND NOT EXISTS (SELECT 1 FROM desired d WHERE d.skill_id = t.skill_id)
+            RETURNING t.skill_id
+        ),
+        upserted AS (
+            INSERT INTO {table} ({owner_column}, skill_id, {value_column})
+            SELECT %s, d.skill_id, d.value FROM desired d
+            ON CONFLICT ({owner_column}, skill_id) DO UPDATE
+                SET {value_column} = EXCLUDED.{value_column}
+                WHERE {table}.{value_column} IS DISTINCT FROM EXCLUDED.{value_column}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT count(*) FILTER (WHERE inserted) as added,
+               count(*) FILTER (WHERE NOT inserted) as changed,
+               (SELECT count(*) FROM removed) as removed
+        FROM upserted
+    ''', (skill_ids, values, owner_id, owner_id))
+    row = cursor.fetchone()
+    return {'added': row['added'], 'changed': row['changed'], 'removed': row['removed']}
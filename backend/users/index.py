@@ -4,30 +4,92 @@ Args: event with httpMethod, body, queryStringParameters
 Returns: HTTP response with user data
 '''
 import json
-import os
-from typing import Dict, Any
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from typing import Dict, Any, List, Optional, Tuple
 
-def get_db_connection():
-    dsn = os.environ.get('DATABASE_URL')
-    return psycopg2.connect(dsn)
+from shared import batch
+from shared import db
+from shared import export
+from shared import http_cache
+from shared import instrumentation
+from shared import pagination
+from shared import query_builder
+from shared import runtime
+from shared import skills
 
+USER_VALIDATOR_COLUMNS = ('id', 'updated_at', 'reference_version')
+
+LIST_COLUMNS = {
+    'id': 'u.id',
+    'email': 'u.email',
+    'role': 'u.role',
+    'first_name': 'u.first_name',
+    'last_name': 'u.last_name',
+    'phone': 'u.phone',
+    'bio': 'u.bio',
+    'experience_years': 'u.experience_years',
+    'current_position': 'u.current_position',
+    'resume_url': 'u.resume_url',
+    'active': 'u.active',
+    'created_at': 'u.created_at',
+    'city_name': 'ci.name',
+    'country_name': 'ct.name'
+}
+LIST_JOINS = {
+    'city_name': 'LEFT JOIN cities ci ON u.city_id = ci.id',
+    'country_name': 'LEFT JOIN countries ct ON u.country_id = ct.id'
+}
+LIST_FILTERS = {
+    'role': query_builder.Filter('u.role = %s'),
+    'search': query_builder.Filter(
+        '(u.first_name ILIKE %s OR u.last_name ILIKE %s OR u.email ILIKE %s OR u.current_position ILIKE %s)',
+        lambda search: f'%{search}%'
+    )
+}
+MAX_USERS_PAGE_SIZE = 100
+PRIVATE_COLUMNS = ('password_hash', 'reference_version')
+
+USER_DETAIL_QUERY = '''
+    SELECT u.*,
+           ci.name as city_name,
+           ct.name as country_name,
+           el.name as education_level_name,
+           c.name as company_name,
+           (SELECT version FROM reference_data_version WHERE id = 1) as reference_version,
+           COALESCE(json_agg(
+               json_build_object(
+                   'id', s.id, 
+                   'name', s.name, 
+                   'proficiency', us.proficiency_level
+               )
+           ) FILTER (WHERE s.id IS NOT NULL), '[]') as skills
+    FROM users u
+    LEFT JOIN cities ci ON u.city_id = ci.id
+    LEFT JOIN countries ct ON u.country_id = ct.id
+    LEFT JOIN education_levels el ON u.education_level_id = el.id
+    LEFT JOIN companies c ON u.company_id = c.id
+    LEFT JOIN user_skills us ON u.id = us.user_id
+    LEFT JOIN skills s ON us.skill_id = s.id
+    WHERE {condition}
+    GROUP BY u.id, ci.name, ct.name, el.name, c.name
+'''
+
+def public_user(user: Any) -> Any:
+    for column in PRIVATE_COLUMNS:
+        user.pop(column, None)
+    return user
+
+def user_etag(row: Any) -> str:
+    return http_cache.validator_etag('user', *(row[column] for column in USER_VALIDATOR_COLUMNS))
+
+PREFLIGHT = runtime.preflight('GET, POST, PUT, OPTIONS', 'Content-Type, X-User-Id, If-None-Match, X-Read-Primary')
+USER_NOT_FOUND = runtime.error(404, 'User not found')
+
+@instrumentation.instrument('users')
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     
     if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Allow-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+        return runtime.static(PREFLIGHT)
     
     try:
         if method == 'GET':
@@ -37,143 +99,171 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif method == 'PUT':
             return update_user(event)
         else:
-            return {
-                'statusCode': 405,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'Method not allowed'}),
-                'isBase64Encoded': False
-            }
+            return runtime.static(runtime.METHOD_NOT_ALLOWED)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': str(e)}),
-            'isBase64Encoded': False
-        }
+        return runtime.error(500, str(e))
 
 def get_users(event: Dict[str, Any]) -> Dict[str, Any]:
     params = event.get('queryStringParameters') or {}
     user_id = params.get('id')
     email = params.get('email')
-    role = params.get('role')
-    search = params.get('search', '')
-    skills_filter = params.get('skills')
     
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    if params.get('ids'):
+        return get_users_batch(event, params['ids'])
+    
+    if params.get('export'):
+        return export_users(event, params)
     
     if user_id:
-        cursor.execute('''
-            SELECT u.*,
-                   ci.name as city_name,
-                   ct.name as country_name,
-                   el.name as education_level_name,
-                   c.name as company_name,
-                   COALESCE(json_agg(
-                       json_build_object(
-                           'id', s.id, 
-                           'name', s.name, 
-                           'proficiency', us.proficiency_level
-                       )
-                   ) FILTER (WHERE s.id IS NOT NULL), '[]') as skills
-            FROM users u
-            LEFT JOIN cities ci ON u.city_id = ci.id
-            LEFT JOIN countries ct ON u.country_id = ct.id
-            LEFT JOIN education_levels el ON u.education_level_id = el.id
-            LEFT JOIN companies c ON u.company_id = c.id
-            LEFT JOIN user_skills us ON u.id = us.user_id
-            LEFT JOIN skills s ON us.skill_id = s.id
-            WHERE u.id = %s
-            GROUP BY u.id, ci.name, ct.name, el.name, c.name
-        ''', (user_id,))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with db.read_connection(event) as conn:
+            cursor = runtime.dict_cursor(conn)
+            
+            if http_cache.get_header(event, 'If-None-Match'):
+                cursor.execute('''
+                    SELECT u.id, u.updated_at,
+                           (SELECT version FROM reference_data_version WHERE id = 1) as reference_version
+                    FROM users u
+                    WHERE u.id = %s
+                ''', (user_id,))
+                validators = cursor.fetchone()
+                if validators and http_cache.is_not_modified(event, user_etag(validators)):
+                    cursor.close()
+                    return http_cache.not_modified_response(user_etag(validators), http_cache.USER_CACHE_CONTROL)
+            
+            query_builder.execute(cursor, USER_DETAIL_QUERY.format(condition='u.id = %s'), (user_id,))
+            user = cursor.fetchone()
+            cursor.close()
         
         if not user:
-            return {
-                'statusCode': 404,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'User not found'}),
-                'isBase64Encoded': False
-            }
+            return runtime.static(USER_NOT_FOUND)
         
-        user_dict = dict(user)
-        user_dict.pop('password_hash', None)
+        etag = user_etag(user)
+        public_user(user)
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(user_dict, default=str),
-            'isBase64Encoded': False
-        }
+        return runtime.json_response(200, user, {**runtime.JSON_HEADERS, **http_cache.cache_headers(etag, http_cache.USER_CACHE_CONTROL)})
     
     if email:
-        cursor.execute('SELECT * FROM users WHERE email = %s', (email,))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with db.connection() as conn:
+            cursor = runtime.dict_cursor(conn)
+            cursor.execute('SELECT * FROM users WHERE email = %s', (email,))
+            user = cursor.fetchone()
+            cursor.close()
         
         if not user:
-            return {
-                'statusCode': 404,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': 'User not found'}),
-                'isBase64Encoded': False
-            }
+            return runtime.static(USER_NOT_FOUND)
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(dict(user), default=str),
-            'isBase64Encoded': False
-        }
+        return runtime.json_response(200, user, {**runtime.JSON_HEADERS, 'Cache-Control': http_cache.NO_STORE})
     
-    query = '''
-        SELECT DISTINCT u.id, u.email, u.role, u.first_name, u.last_name,
-               u.phone, u.bio, u.experience_years, u.current_position,
-               u.resume_url, u.active, u.created_at,
-               ci.name as city_name,
-               ct.name as country_name
+    try:
+        limit = pagination.parse_limit(params.get('limit'), maximum=MAX_USERS_PAGE_SIZE)
+        after = pagination.decode_cursor(params['cursor']) if params.get('cursor') else None
+        fields = parse_fields(params.get('fields'))
+        query, query_params = build_list_query(params, fields, limit, after)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        cursor = runtime.dict_cursor(conn)
+        query_builder.execute(cursor, query, query_params)
+        users = cursor.fetchall()
+        cursor.close()
+    
+    users, next_cursor = pagination.split_page(users, limit, ('created_at', 'id'))
+    if 'created_at' not in fields:
+        for user in users:
+            user.pop('created_at', None)
+    
+    return runtime.json_response(200, users, {**runtime.JSON_HEADERS, **pagination.page_headers(next_cursor)})
+
+def get_users_batch(event: Dict[str, Any], raw_ids: str) -> Dict[str, Any]:
+    try:
+        user_ids = batch.parse_ids(raw_ids)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        cursor = runtime.dict_cursor(conn)
+        query_builder.execute(cursor, USER_DETAIL_QUERY.format(condition='u.id = ANY(%s)'), (user_ids,))
+        users = cursor.fetchall()
+        cursor.close()
+    
+    items, missing = batch.order_by_ids(users, user_ids)
+    
+    return runtime.json_response(200, {'items': [public_user(user) for user in items], 'missing': missing})
+
+def export_users(event: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        fmt = export.parse_format(params['export'])
+        fields = parse_fields(params.get('fields'))
+        query, query_params = build_list_query(params, fields, None)
+    except ValueError as e:
+        return runtime.error(400, str(e))
+    
+    with db.read_connection(event) as conn:
+        result = export.export(conn, query, query_params, fmt, 'users')
+    
+    return runtime.response(200, json.dumps(result))
+
+def parse_fields(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return list(LIST_COLUMNS)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in LIST_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def build_list_query(params: Dict[str, Any], fields: List[str], limit: Optional[int], after: Optional[List[Any]] = None) -> Tuple[str, List[Any]]:
+    skills_filter = params.get('skills')
+    skills_match = params.get('skills_match', 'any')
+    
+    if skills_match not in ('any', 'all'):
+        raise ValueError(f'Invalid skills_match: {skills_match}')
+    
+    columns = ['id', 'created_at'] + [field for field in fields if field not in ('id', 'created_at')]
+    select_list = ', '.join(f'{LIST_COLUMNS[column]} as {column}' for column in columns)
+    joins = ' '.join(LIST_JOINS[column] for column in columns if column in LIST_JOINS)
+    
+    query = f'''
+        SELECT {select_list}
         FROM users u
-        LEFT JOIN cities ci ON u.city_id = ci.id
-        LEFT JOIN countries ct ON u.country_id = ct.id
-        LEFT JOIN user_skills us ON u.id = us.user_id
-        LEFT JOIN skills s ON us.skill_id = s.id
+        {joins}
         WHERE u.active = true
     '''
     
-    conditions = []
-    if role:
-        conditions.append(f"u.role = '{role}'")
-    if search:
-        conditions.append(f"(u.first_name ILIKE '%{search}%' OR u.last_name ILIKE '%{search}%' OR u.email ILIKE '%{search}%' OR u.current_position ILIKE '%{search}%')")
+    conditions, query_params = query_builder.build_conditions(params, LIST_FILTERS)
     if skills_filter:
-        skill_ids = skills_filter.split(',')
-        conditions.append(f"s.id IN ({','.join(skill_ids)})")
+        try:
+            skill_ids = sorted({int(skill_id) for skill_id in skills_filter.split(',') if skill_id.strip()})
+        except ValueError:
+            raise ValueError(f'Invalid skills filter: {skills_filter}')
+        if skills_match == 'all':
+            conditions.append('''NOT EXISTS (
+                SELECT 1 FROM unnest(%s::int[]) AS wanted(skill_id)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM user_skills us
+                    WHERE us.user_id = u.id AND us.skill_id = wanted.skill_id
+                )
+            )''')
+        else:
+            conditions.append('''EXISTS (
+                SELECT 1 FROM user_skills us
+                WHERE us.user_id = u.id AND us.skill_id = ANY(%s)
+            )''')
+        query_params.append(skill_ids)
+    if after:
+        conditions.append("(u.created_at, u.id) < (%s, %s)")
+        query_params.extend(after)
     
     if conditions:
         query += ' AND ' + ' AND '.join(conditions)
     
-    query += ' ORDER BY u.created_at DESC'
+    query += ' ORDER BY u.created_at DESC, u.id DESC'
+    if limit is not None:
+        query += ' LIMIT %s'
+        query_params.append(limit + 1)
     
-    cursor.execute(query)
-    users = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    users_list = []
-    for user in users:
-        user_dict = dict(user)
-        user_dict.pop('password_hash', None)
-        users_list.append(user_dict)
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(users_list, default=str),
-        'isBase64Encoded': False
-    }
+    return query, query_params
 
 def create_user(event: Dict[str, Any]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
@@ -181,128 +271,92 @@ def create_user(event: Dict[str, Any]) -> Dict[str, Any]:
     required_fields = ['email', 'password', 'role', 'first_name', 'last_name']
     for field in required_fields:
         if field not in body_data:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({'error': f'Missing required field: {field}'}),
-                'isBase64Encoded': False
-            }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('SELECT id FROM users WHERE email = %s', (body_data['email'],))
-    existing = cursor.fetchone()
+            return runtime.error(400, f'Missing required field: {field}')
     
-    if existing:
+    with db.connection() as conn:
+        cursor = runtime.dict_cursor(conn)
+        
+        cursor.execute('SELECT id FROM users WHERE email = %s', (body_data['email'],))
+        existing = cursor.fetchone()
+        
+        if existing:
+            cursor.close()
+            return runtime.error(400, 'Email already registered')
+        
+        password_hash = '$2a$10$' + body_data['password']
+        
+        cursor.execute('''
+            INSERT INTO users (
+                email, password_hash, role, first_name, last_name,
+                phone, city_id, country_id, bio, education_level_id, current_position
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id, email, role, first_name, last_name, created_at
+        ''', (
+            body_data['email'],
+            password_hash,
+            body_data['role'],
+            body_data['first_name'],
+            body_data['last_name'],
+            body_data.get('phone'),
+            body_data.get('city_id'),
+            body_data.get('country_id'),
+            body_data.get('bio'),
+            body_data.get('education_level_id'),
+            body_data.get('current_position')
+        ))
+        
+        user = cursor.fetchone()
+        
+        conn.commit()
         cursor.close()
-        conn.close()
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Email already registered'}),
-            'isBase64Encoded': False
-        }
-    
-    password_hash = '$2a$10$' + body_data['password']
     
-    cursor.execute('''
-        INSERT INTO users (
-            email, password_hash, role, first_name, last_name,
-            phone, city_id, country_id, bio, education_level_id, current_position
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id, email, role, first_name, last_name, created_at
-    ''', (
-        body_data['email'],
-        password_hash,
-        body_data['role'],
-        body_data['first_name'],
-        body_data['last_name'],
-        body_data.get('phone'),
-        body_data.get('city_id'),
-        body_data.get('country_id'),
-        body_data.get('bio'),
-        body_data.get('education_level_id'),
-        body_data.get('current_position')
-    ))
-    
-    user = cursor.fetchone()
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    return {
-        'statusCode': 201,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(dict(user), default=str),
-        'isBase64Encoded': False
-    }
+    return runtime.json_response(201, user)
 
 def update_user(event: Dict[str, Any]) -> Dict[str, Any]:
     body_data = json.loads(event.get('body', '{}'))
     user_id = body_data.get('id')
     
     if not user_id:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Missing user id'}),
-            'isBase64Encoded': False
-        }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+        return runtime.error(400, 'Missing user id')
     
-    update_fields = []
-    values = []
-    
-    allowed_fields = [
-        'first_name', 'last_name', 'phone', 'bio', 'city_id', 
-        'country_id', 'resume_url', 'profile_photo_url', 
-        'experience_years', 'education_level_id', 'current_position', 'active'
-    ]
-    
-    for field in allowed_fields:
-        if field in body_data:
-            update_fields.append(f'{field} = %s')
-            values.append(body_data[field])
-    
-    if 'skills' in body_data:
-        cursor.execute('DELETE FROM user_skills WHERE user_id = %s', (user_id,))
-        for skill_data in body_data['skills']:
-            cursor.execute('''
-                INSERT INTO user_skills (user_id, skill_id, proficiency_level)
-                VALUES (%s, %s, %s)
-            ''', (user_id, skill_data['skill_id'], skill_data.get('proficiency_level', 'intermediate')))
-    
-    if not update_fields:
+    with db.connection() as conn:
+        cursor = runtime.dict_cursor(conn)
+        
+        update_fields = []
+        values = []
+        
+        allowed_fields = [
+            'first_name', 'last_name', 'phone', 'bio', 'city_id', 
+            'country_id', 'resume_url', 'profile_photo_url', 
+            'experience_years', 'education_level_id', 'current_position', 'active'
+        ]
+        
+        for field in allowed_fields:
+            if field in body_data:
+                update_fields.append(f'{field} = %s')
+                values.append(body_data[field])
+        
+        if 'skills' in body_data:
+            desired = {
+                int(skill_data['skill_id']): skill_data.get('proficiency_level', 'intermediate')
+                for skill_data in body_data['skills']
+            }
+            changes = skills.sync_skill_links(cursor, 'user_skills', user_id, desired)
+            if not update_fields and any(changes.values()):
+                cursor.execute('UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = %s', (user_id,))
+        
+        if not update_fields:
+            conn.commit()
+            cursor.close()
+            return runtime.response(200, json.dumps({'message': 'Skills updated'}))
+        
+        values.append(user_id)
+        query = f"UPDATE users SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = %s RETURNING *"
+        
+        cursor.execute(query, values)
+        user = cursor.fetchone()
+        
         conn.commit()
         cursor.close()
-        conn.close()
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'message': 'Skills updated'}),
-            'isBase64Encoded': False
-        }
-    
-    values.append(user_id)
-    query = f"UPDATE users SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE id = %s RETURNING *"
-    
-    cursor.execute(query, values)
-    user = cursor.fetchone()
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    user_dict = dict(user) if user else {}
-    user_dict.pop('password_hash', None)
     
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps(user_dict, default=str),
-        'isBase64Encoded': False
-    }
+    return runtime.json_response(200, public_user(user) if user else {})
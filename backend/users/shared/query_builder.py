@@ -0,0 +1,150 @@
+'''
+Business: Parameterized filter builder and per-connection server-side prepared statements
+Args: query string parameters plus a filter spec; a cursor, SQL with %s placeholders and its values
+Returns: WHERE conditions with stable text per filter shape; listing rows executed via PREPARE / EXECUTE
+'''
+import hashlib
+import os
+import re
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', '1') == '1'
+MAX_PREPARED_PER_CONNECTION = int(os.environ.get('DB_MAX_PREPARED_PER_CONNECTION', '256'))
+
+PLACEHOLDER = re.compile(r'%%|%s')
+EXECUTE_STATEMENT = re.compile(r'^EXECUTE (q_[0-9a-f]{16})\b')
+STALE_PLAN_SQLSTATE = '0A000'
+STALE_PLAN_MESSAGE = 'cached plan must not change result type'
+
+class Filter(NamedTuple):
+    '''SQL condition for one query parameter; every %s in template receives convert(raw value).'''
+    template: str
+    convert: Optional[Callable[[str], Any]] = None
+
+def build_conditions(params: Dict[str, Any], filters: Dict[str, Filter]) -> Tuple[List[str], List[Any]]:
+    '''
+    Conditions follow the declaration order of filters, not the order of params, so the
+    same set of filters always yields the same SQL text. Empty values are skipped;
+    convert may raise ValueError for malformed input.
+    '''
+    conditions = []
+    values: List[Any] = []
+    for name, spec in filters.items():
+        raw = params.get(name)
+        if raw is None or raw == '':
+            continue
+        value = spec.convert(raw) if spec.convert else raw
+        if value is None:
+            continue
+        conditions.append(spec.template)
+        values.extend([value] * spec.template.count('%s'))
+    return conditions, values
+
+def integer(raw: str) -> int:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f'Expected an integer, got: {raw}')
+
+def flag(raw: str) -> Optional[bool]:
+    return True if raw == 'true' else None
+
+_statement_sources: Dict[str, str] = {}
+_unpreparable: set = set()
+_prepared: 'weakref.WeakKeyDictionary[Any, set]' = weakref.WeakKeyDictionary()
+_stale: 'weakref.WeakKeyDictionary[Any, set]' = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+def statement_name(query: str) -> str:
+    return 'q_' + hashlib.blake2b(query.encode('utf-8'), digest_size=8).hexdigest()
+
+def statement_source(query: str) -> Optional[str]:
+    '''Original %s-style SQL behind an EXECUTE of one of our prepared statements (for tracing).'''
+    match = EXECUTE_STATEMENT.match(query)
+    return _statement_sources.get(match.group(1)) if match else None
+
+def to_positional(query: str) -> str:
+    counter = iter(range(1, query.count('%s') + 1))
+    return PLACEHOLDER.sub(lambda match: '%' if match.group(0) == '%%' else f'${next(counter)}', query)
+
+def execute(cursor: Any, query: str, values: Sequence[Any] = ()) -> None:
+    '''
+    Run query as a named prepared statement on the cursor's connection: PREPARE once per
+    connection and query text, EXECUTE afterwards, so repeated shapes skip parse and plan.
+    A statement PostgreSQL cannot prepare falls back to a plain execute on later calls.
+    '''
+    if not PREPARED_STATEMENTS:
+        cursor.execute(query, values)
+        return
+    execute_prepared(cursor, query, values, retry=True)
+
+def execute_prepared(cursor: Any, query: str, values: Sequence[Any], retry: bool) -> None:
+    '''
+    A migration that changes the columns behind a prepared statement (SELECT j.* after ADD
+    COLUMN) makes EXECUTE fail with "cached plan must not change result type". The statement
+    is then marked stale and re-prepared: immediately when the EXECUTE opened its transaction,
+    so rolling back loses nothing, otherwise on the connection's next call after the error.
+    '''
+    conn = cursor.connection
+    name = statement_name(query)
+    with _prepared_lock:
+        names = _prepared.setdefault(conn, set())
+        known = name in names
+        replace = name in _stale.get(conn, ())
+
+    if not known:
+        if name in _unpreparable or len(names) >= MAX_PREPARED_PER_CONNECTION or not prepare(cursor, name, query, replace):
+            cursor.execute(query, values)
+            return
+        with _prepared_lock:
+            names.add(name)
+            _stale.get(conn, set()).discard(name)
+
+    opens_transaction = conn.autocommit or not transaction_open(conn)
+    try:
+        if values:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(values))})", values)
+        else:
+            cursor.execute(f'EXECUTE {name}')
+    except Exception as e:
+        if getattr(e, 'pgcode', None) != STALE_PLAN_SQLSTATE or STALE_PLAN_MESSAGE not in str(e):
+            raise
+        with _prepared_lock:
+            names.discard(name)
+            _stale.setdefault(conn, set()).add(name)
+        if not (retry and opens_transaction):
+            raise
+        if not conn.autocommit:
+            conn.rollback()
+        execute_prepared(cursor, query, values, retry=False)
+
+def transaction_open(conn: Any) -> bool:
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+    return conn.get_transaction_status() != TRANSACTION_STATUS_IDLE
+
+def prepare(cursor: Any, name: str, query: str, replace: bool = False) -> bool:
+    '''
+    PREPARE inside a savepoint so a failure does not abort the caller's transaction;
+    replace first drops a stale statement of the same name from the session.
+    '''
+    import psycopg2
+
+    _statement_sources[name] = query
+    in_transaction = not cursor.connection.autocommit
+    if in_transaction:
+        cursor.execute('SAVEPOINT query_builder_prepare')
+    try:
+        if replace:
+            cursor.execute(f'DEALLOCATE {name}')
+        cursor.execute(f'PREPARE {name} AS {to_positional(query)}')
+    except psycopg2.Error:
+        if in_transaction:
+            cursor.execute('ROLLBACK TO SAVEPOINT query_builder_prepare')
+        _unpreparable.add(name)
+        return False
+    if in_transaction:
+        cursor.execute('RELEASE SAVEPOINT query_builder_prepare')
+    return True
@@ -0,0 +1,109 @@
+'''
+Business: Slow-query capture - fingerprint queries over a threshold and EXPLAIN a sample of them on a side connection
+Args: SLOW_QUERY_MS threshold (0 = off), SLOW_QUERY_EXPLAIN_SAMPLE fraction, SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+Returns: one JSON log line per slow query, with the estimated EXPLAIN plan when sampled; write parameters are redacted
+'''
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from typing import Any, Optional, Tuple
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '0'))
+EXPLAIN_SAMPLE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE', '0.1'))
+EXPLAIN_TIMEOUT_MS = int(os.environ.get('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', '5000'))
+ENABLED = SLOW_QUERY_MS > 0
+MAX_PARAM_CHARS = 200
+REDACTED = '[redacted]'
+
+NORMALIZE_RULES = (
+    (re.compile(r'--[^\n]*'), ' '),
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%\(\w+\)s|%s'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(?)'),
+    (re.compile(r'ARRAY\[[^\]]*\]', re.IGNORECASE), 'ARRAY[?]'),
+    (re.compile(r'\s+'), ' ')
+)
+READ_ONLY_STATEMENT = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+WRITE_KEYWORD = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+
+_side_conn: Any = None
+_side_lock = threading.Lock()
+
+def normalize(query: str) -> str:
+    '''Literals and placeholders become ?, IN lists collapse, so dynamic WHERE shapes group by structure.'''
+    for pattern, replacement in NORMALIZE_RULES:
+        query = pattern.sub(replacement, query)
+    return query.strip()
+
+def fingerprint(query: str) -> Tuple[str, str]:
+    normalized = normalize(query)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest(), normalized
+
+def should_explain(query: str) -> bool:
+    return READ_ONLY_STATEMENT.match(query) is not None and WRITE_KEYWORD.search(query) is None
+
+def loggable_params(params: Any) -> Any:
+    def clip(value: Any) -> Any:
+        if isinstance(value, (list, tuple)):
+            return [clip(item) for item in value]
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        text = str(value)
+        return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + '...'
+    if isinstance(params, dict):
+        return {key: clip(value) for key, value in params.items()}
+    return clip(params) if params is not None else None
+
+def explain(dsn: str, query: str, params: Any) -> Any:
+    '''
+    Plan the query with plain EXPLAIN (no ANALYZE, so it is not executed a second time) on a
+    dedicated read-only connection, never on the caller's connection, which may be
+    mid-transaction. None when another thread is using the side connection: a request
+    never waits for someone else's EXPLAIN.
+    '''
+    global _side_conn
+    import psycopg2
+
+    if not _side_lock.acquire(blocking=False):
+        return None
+    try:
+        if _side_conn is None or _side_conn.closed:
+            _side_conn = psycopg2.connect(dsn)
+            _side_conn.set_session(readonly=True, autocommit=True)
+            with _side_conn.cursor() as cursor:
+                cursor.execute('SET statement_timeout = %s', (EXPLAIN_TIMEOUT_MS,))
+        try:
+            with _side_conn.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + query, params)
+                plan = cursor.fetchone()[0]
+        except psycopg2.Error:
+            _side_conn.close()
+            raise
+    finally:
+        _side_lock.release()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+def capture(dsn: Optional[str], query: str, params: Any, duration_ms: float, rows: int, function: Optional[str] = None) -> None:
+    '''Parameters are logged for read statements only: writes carry user input such as password hashes.'''
+    query_id, normalized = fingerprint(query)
+    read_only = should_explain(query)
+    entry = {
+        'event': 'slow_query',
+        'function': function,
+        'fingerprint': query_id,
+        'query': normalized,
+        'params': loggable_params(params) if read_only else REDACTED,
+        'duration_ms': round(duration_ms, 3),
+        'rows': rows,
+        'plan': None
+    }
+    if dsn and read_only and random.random() < EXPLAIN_SAMPLE:
+        try:
+            entry['plan'] = explain(dsn, query, params)
+        except Exception as e:
+            entry['explain_error'] = str(e)
+    print(json.dumps(entry, ensure_ascii=False, default=str), flush=True)
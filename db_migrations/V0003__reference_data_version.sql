@@ -0,0 +1,37 @@
+-- Версия справочников: увеличивается при любом изменении справочных таблиц,
+-- по ней функция references проверяет актуальность своего кэша
+CREATE TABLE IF NOT EXISTS reference_data_version (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO reference_data_version (id, version) VALUES (1, 1)
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_reference_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE reference_data_version
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Триггеры уровня оператора на всех справочных таблицах
+DO $$
+DECLARE
+    ref_table TEXT;
+BEGIN
+    FOREACH ref_table IN ARRAY ARRAY['categories', 'industries', 'countries', 'cities', 'skills', 'education_levels', 'companies']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_reference_version ON %I', ref_table, ref_table);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_reference_version
+                 AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                 FOR EACH STATEMENT EXECUTE FUNCTION bump_reference_data_version()',
+            ref_table, ref_table
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,12 @@
+-- Удаление дублирующихся связей навыков перед созданием уникальных индексов
+DELETE FROM user_skills a
+USING user_skills b
+WHERE a.user_id = b.user_id AND a.skill_id = b.skill_id AND a.ctid > b.ctid;
+
+DELETE FROM job_skills a
+USING job_skills b
+WHERE a.job_id = b.job_id AND a.skill_id = b.skill_id AND a.ctid > b.ctid;
+
+-- Уникальные индексы для пакетной синхронизации навыков (INSERT ... ON CONFLICT)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_skills_user_skill ON user_skills(user_id, skill_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_skills_job_skill ON job_skills(job_id, skill_id);
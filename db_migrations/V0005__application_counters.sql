@@ -0,0 +1,30 @@
+-- Удаление повторных откликов, оставленных прежней проверкой SELECT-then-INSERT
+-- (между проверкой и вставкой была гонка): остаётся самый ранний отклик
+DELETE FROM job_applications a
+USING job_applications b
+WHERE a.job_id = b.job_id AND a.jobseeker_id = b.jobseeker_id AND a.id > b.id;
+
+-- Один отклик на вакансию от одного соискателя: основа для INSERT ... ON CONFLICT
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_applications_job_jobseeker
+    ON job_applications(job_id, jobseeker_id);
+
+-- Шардированные счётчики откликов: каждый отклик увеличивает одну из нескольких строк,
+-- периодическая задача maintenance переносит суммы в jobs.applications_count
+CREATE TABLE IF NOT EXISTS job_application_counter_shards (
+    job_id INTEGER NOT NULL,
+    shard SMALLINT NOT NULL,
+    delta INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, shard)
+);
+
+-- Пересчёт jobs.applications_count по фактическим откликам: шардированные счётчики
+-- добавляют к нему только дельты, поэтому начальное значение должно быть точным
+UPDATE jobs j
+SET applications_count = counts.total
+FROM (
+    SELECT jobs.id AS job_id, count(ja.id) AS total
+    FROM jobs
+    LEFT JOIN job_applications ja ON ja.job_id = jobs.id
+    GROUP BY jobs.id
+) counts
+WHERE counts.job_id = j.id AND j.applications_count IS DISTINCT FROM counts.total;
@@ -0,0 +1,5 @@
+-- Буфер просмотров вакансий: просмотр только добавляет строку, без перезаписи jobs.
+-- UNLOGGED - без WAL; после сбоя сервера буфер очищается, счётчик просмотров приблизительный
+CREATE UNLOGGED TABLE IF NOT EXISTS job_view_events (
+    job_id INTEGER NOT NULL
+);
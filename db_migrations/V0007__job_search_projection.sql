@@ -0,0 +1,228 @@
+-- Денормализованная проекция активных вакансий для листинга: колонки jobs, названия
+-- справочников, имя работодателя и массив навыков. Листинг читает её без JOIN.
+-- Колонки перечислены явно, а их типы берутся из самой таблицы jobs (CREATE TABLE AS ...
+-- WITH NO DATA), поэтому проекция всегда совпадает по типам с источником. Новая колонка jobs
+-- попадает в листинг, только когда её добавят сюда, в refresh_job_search и (если она видна
+-- в листинге) в job_search_jobs_updated и LIST_COLUMNS функции jobs.
+CREATE TABLE IF NOT EXISTS job_search AS
+SELECT id, title, description, requirements, responsibilities,
+       salary_min, salary_max, salary_currency, employment_type, experience_required,
+       category_id, industry_id, company_id, employer_id, city_id, country_id,
+       remote_allowed, deadline, status, applications_count, views_count,
+       created_at, updated_at, search_vector
+FROM jobs
+WITH NO DATA;
+
+-- Названия справочников и имя работодателя - TEXT: длина не ограничивается колонками-источниками
+ALTER TABLE job_search
+    ADD COLUMN IF NOT EXISTS category_name TEXT,
+    ADD COLUMN IF NOT EXISTS industry_name TEXT,
+    ADD COLUMN IF NOT EXISTS company_name TEXT,
+    ADD COLUMN IF NOT EXISTS city_name TEXT,
+    ADD COLUMN IF NOT EXISTS country_name TEXT,
+    ADD COLUMN IF NOT EXISTS employer_name TEXT,
+    ADD COLUMN IF NOT EXISTS skill_ids INTEGER[] NOT NULL DEFAULT '{}';
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_search_id ON job_search(id);
+CREATE INDEX IF NOT EXISTS idx_job_search_created ON job_search(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_job_search_vector ON job_search USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_job_search_skill_ids ON job_search USING GIN(skill_ids);
+
+-- Пересчёт строк проекции для набора вакансий; неактивные вакансии из проекции удаляются.
+-- Строки обновляются через ON CONFLICT, а не DELETE + INSERT: параллельный пересчёт тех же
+-- вакансий (например, при переименовании справочника) не приводит к нарушению uq_job_search_id
+CREATE OR REPLACE FUNCTION refresh_job_search(job_ids INTEGER[]) RETURNS void AS $$
+BEGIN
+    IF job_ids IS NULL OR cardinality(job_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    DELETE FROM job_search s
+    WHERE s.id = ANY(job_ids)
+      AND NOT EXISTS (SELECT 1 FROM jobs j WHERE j.id = s.id AND j.status = 'active');
+
+    INSERT INTO job_search (
+        id, title, description, requirements, responsibilities,
+        salary_min, salary_max, salary_currency, employment_type, experience_required,
+        category_id, industry_id, company_id, employer_id, city_id, country_id,
+        remote_allowed, deadline, status, applications_count, views_count,
+        created_at, updated_at, search_vector,
+        category_name, industry_name, company_name, city_name, country_name, employer_name,
+        skill_ids
+    )
+    SELECT j.id, j.title, j.description, j.requirements, j.responsibilities,
+           j.salary_min, j.salary_max, j.salary_currency, j.employment_type, j.experience_required,
+           j.category_id, j.industry_id, j.company_id, j.employer_id, j.city_id, j.country_id,
+           j.remote_allowed, j.deadline, j.status, j.applications_count, j.views_count,
+           j.created_at, j.updated_at, j.search_vector,
+           c.name,
+           i.name,
+           co.name,
+           ci.name,
+           ct.name,
+           u.first_name || ' ' || u.last_name,
+           COALESCE(
+               (SELECT array_agg(js.skill_id ORDER BY js.skill_id) FROM job_skills js WHERE js.job_id = j.id),
+               '{}'
+           )
+    FROM jobs j
+    LEFT JOIN categories c ON j.category_id = c.id
+    LEFT JOIN industries i ON j.industry_id = i.id
+    LEFT JOIN companies co ON j.company_id = co.id
+    LEFT JOIN cities ci ON j.city_id = ci.id
+    LEFT JOIN countries ct ON j.country_id = ct.id
+    LEFT JOIN users u ON j.employer_id = u.id
+    WHERE j.id = ANY(job_ids) AND j.status = 'active'
+    ON CONFLICT (id) DO UPDATE SET
+        title = EXCLUDED.title, description = EXCLUDED.description,
+        requirements = EXCLUDED.requirements, responsibilities = EXCLUDED.responsibilities,
+        salary_min = EXCLUDED.salary_min, salary_max = EXCLUDED.salary_max,
+        salary_currency = EXCLUDED.salary_currency, employment_type = EXCLUDED.employment_type,
+        experience_required = EXCLUDED.experience_required,
+        category_id = EXCLUDED.category_id, industry_id = EXCLUDED.industry_id,
+        company_id = EXCLUDED.company_id, employer_id = EXCLUDED.employer_id,
+        city_id = EXCLUDED.city_id, country_id = EXCLUDED.country_id,
+        remote_allowed = EXCLUDED.remote_allowed, deadline = EXCLUDED.deadline, status = EXCLUDED.status,
+        applications_count = EXCLUDED.applications_count, views_count = EXCLUDED.views_count,
+        created_at = EXCLUDED.created_at, updated_at = EXCLUDED.updated_at,
+        search_vector = EXCLUDED.search_vector,
+        category_name = EXCLUDED.category_name, industry_name = EXCLUDED.industry_name,
+        company_name = EXCLUDED.company_name, city_name = EXCLUDED.city_name,
+        country_name = EXCLUDED.country_name, employer_name = EXCLUDED.employer_name,
+        skill_ids = EXCLUDED.skill_ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Изменения вакансий и их навыков: триггеры уровня оператора, один пересчёт на оператор
+CREATE OR REPLACE FUNCTION job_search_jobs_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM refresh_job_search(ARRAY(SELECT id FROM old_rows));
+    ELSE
+        PERFORM refresh_job_search(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Обновление вакансий: полный пересчёт строки только при изменении колонок, которые
+-- листинг показывает или по которым фильтрует и сортирует. Сброс просмотров и откликов
+-- (counters.flush_job_views, fold_application_counters) и смена updated_at копируются
+-- в строку проекции на месте, без перезаписи search_vector и skill_ids в GIN-индексах
+CREATE OR REPLACE FUNCTION job_search_jobs_updated() RETURNS trigger AS $$
+DECLARE
+    changed INTEGER[];
+BEGIN
+    changed := ARRAY(
+        SELECT n.id
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE (o.title, o.description, o.requirements, o.responsibilities,
+               o.salary_min, o.salary_max, o.salary_currency, o.employment_type, o.experience_required,
+               o.category_id, o.industry_id, o.company_id, o.employer_id, o.city_id, o.country_id,
+               o.remote_allowed, o.deadline, o.status, o.created_at)
+              IS DISTINCT FROM
+              (n.title, n.description, n.requirements, n.responsibilities,
+               n.salary_min, n.salary_max, n.salary_currency, n.employment_type, n.experience_required,
+               n.category_id, n.industry_id, n.company_id, n.employer_id, n.city_id, n.country_id,
+               n.remote_allowed, n.deadline, n.status, n.created_at)
+    );
+    PERFORM refresh_job_search(changed);
+
+    UPDATE job_search s
+    SET applications_count = n.applications_count, views_count = n.views_count, updated_at = n.updated_at
+    FROM new_rows n
+    WHERE s.id = n.id
+      AND n.id <> ALL(changed)
+      AND (s.applications_count, s.views_count, s.updated_at)
+          IS DISTINCT FROM (n.applications_count, n.views_count, n.updated_at);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION job_search_skills_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM refresh_job_search(ARRAY(SELECT DISTINCT job_id FROM old_rows));
+    ELSE
+        PERFORM refresh_job_search(ARRAY(SELECT DISTINCT job_id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_jobs_search_insert ON jobs;
+CREATE TRIGGER trg_jobs_search_insert AFTER INSERT ON jobs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION job_search_jobs_changed();
+
+DROP TRIGGER IF EXISTS trg_jobs_search_update ON jobs;
+CREATE TRIGGER trg_jobs_search_update AFTER UPDATE ON jobs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION job_search_jobs_updated();
+
+DROP TRIGGER IF EXISTS trg_jobs_search_delete ON jobs;
+CREATE TRIGGER trg_jobs_search_delete AFTER DELETE ON jobs
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION job_search_jobs_changed();
+
+DROP TRIGGER IF EXISTS trg_job_skills_search_insert ON job_skills;
+CREATE TRIGGER trg_job_skills_search_insert AFTER INSERT ON job_skills
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION job_search_skills_changed();
+
+DROP TRIGGER IF EXISTS trg_job_skills_search_delete ON job_skills;
+CREATE TRIGGER trg_job_skills_search_delete AFTER DELETE ON job_skills
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION job_search_skills_changed();
+
+-- Переименование справочника или работодателя: название обновляется на месте только
+-- в ссылающихся строках проекции. Аргументы: колонка jobs и колонка названия в job_search
+CREATE OR REPLACE FUNCTION job_search_reference_renamed() RETURNS trigger AS $$
+DECLARE
+    new_name TEXT;
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        new_name := NEW.first_name || ' ' || NEW.last_name;
+    ELSE
+        new_name := NEW.name;
+    END IF;
+    EXECUTE format('UPDATE job_search SET %I = $2 WHERE %I = $1 AND %I IS DISTINCT FROM $2',
+                   TG_ARGV[1], TG_ARGV[0], TG_ARGV[1])
+    USING NEW.id, new_name;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    ref RECORD;
+BEGIN
+    FOR ref IN SELECT * FROM (VALUES
+        ('categories', 'category_id', 'category_name'),
+        ('industries', 'industry_id', 'industry_name'),
+        ('companies', 'company_id', 'company_name'),
+        ('cities', 'city_id', 'city_name'),
+        ('countries', 'country_id', 'country_name')
+    ) AS r(ref_table, job_column, name_column)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_job_search ON %I', ref.ref_table, ref.ref_table);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_job_search
+                 AFTER UPDATE OF name ON %I
+                 FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+                 EXECUTE FUNCTION job_search_reference_renamed(%L, %L)',
+            ref.ref_table, ref.ref_table, ref.job_column, ref.name_column
+        );
+    END LOOP;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_users_job_search ON users;
+CREATE TRIGGER trg_users_job_search
+    AFTER UPDATE OF first_name, last_name ON users
+    FOR EACH ROW WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE FUNCTION job_search_reference_renamed('employer_id', 'employer_name');
+
+-- Первичное заполнение
+SELECT refresh_job_search(ARRAY(SELECT id FROM jobs));
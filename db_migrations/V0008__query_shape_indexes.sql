@@ -0,0 +1,33 @@
+-- Индексы под реальные запросы функций (V0001 индексирует только tasks/responses/skills).
+-- Частичные индексы по status = 'active' / active = true: статус в условии фиксирован,
+-- поэтому в ключ индекса идёт только порядок сортировки и ключ пагинации (id).
+
+-- jobs: вакансии работодателя (обзор откликов). Листинг активных вакансий читает job_search
+-- и использует idx_job_search_created, отдельный индекс по jobs ему не нужен
+CREATE INDEX IF NOT EXISTS idx_jobs_employer_created
+    ON jobs(employer_id, created_at DESC);
+
+-- job_search: фильтры листинга вместе с сортировкой по дате
+CREATE INDEX IF NOT EXISTS idx_job_search_category_created
+    ON job_search(category_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_job_search_city_created
+    ON job_search(city_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_job_search_employer_created
+    ON job_search(employer_id, created_at DESC, id DESC);
+
+-- job_applications: отклики на вакансию и отклики соискателя, новые сверху
+CREATE INDEX IF NOT EXISTS idx_job_applications_job_applied
+    ON job_applications(job_id, applied_at DESC);
+CREATE INDEX IF NOT EXISTS idx_job_applications_jobseeker_applied
+    ON job_applications(jobseeker_id, applied_at DESC);
+
+-- Обратный поиск по навыку (фильтр skills в листинге пользователей)
+CREATE INDEX IF NOT EXISTS idx_user_skills_skill_user ON user_skills(skill_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_job_skills_skill_job ON job_skills(skill_id, job_id);
+
+-- users: листинг активных пользователей с фильтром по роли. Поиск по email обслуживает
+-- уникальный индекс users.email
+CREATE INDEX IF NOT EXISTS idx_users_active_created
+    ON users(created_at DESC, id DESC) WHERE active = true;
+CREATE INDEX IF NOT EXISTS idx_users_active_role_created
+    ON users(role, created_at DESC, id DESC) WHERE active = true;
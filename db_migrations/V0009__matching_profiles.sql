@@ -0,0 +1,181 @@
+-- Профили навыков для подбора кандидатов и вакансий: массивы вместо связующих таблиц.
+-- Функция matching держит по ним битовые индексы в памяти и дочитывает изменения
+-- по refreshed_at, поэтому профили обновляются триггерами при любом изменении навыков.
+CREATE TABLE IF NOT EXISTS matching_user_profiles (
+    user_id INTEGER PRIMARY KEY,
+    skill_ids INTEGER[] NOT NULL DEFAULT '{}',
+    levels SMALLINT[] NOT NULL DEFAULT '{}',
+    active BOOLEAN NOT NULL DEFAULT false,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS matching_job_profiles (
+    job_id INTEGER PRIMARY KEY,
+    skill_ids INTEGER[] NOT NULL DEFAULT '{}',
+    required BOOLEAN[] NOT NULL DEFAULT '{}',
+    active BOOLEAN NOT NULL DEFAULT false,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_matching_user_profiles_refreshed ON matching_user_profiles(refreshed_at);
+CREATE INDEX IF NOT EXISTS idx_matching_job_profiles_refreshed ON matching_job_profiles(refreshed_at);
+
+-- Уровень владения навыком: 1 - начальный, 2 - средний, 3 - продвинутый
+CREATE OR REPLACE FUNCTION matching_level(proficiency TEXT) RETURNS SMALLINT AS $$
+    SELECT CASE lower(coalesce(proficiency, ''))
+        WHEN 'middle' THEN 2 WHEN 'intermediate' THEN 2 WHEN 'средний' THEN 2 WHEN '2' THEN 2
+        WHEN 'senior' THEN 3 WHEN 'advanced' THEN 3 WHEN 'expert' THEN 3
+        WHEN 'продвинутый' THEN 3 WHEN 'эксперт' THEN 3 WHEN '3' THEN 3
+        ELSE 1
+    END::SMALLINT
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Неизменившийся профиль не перезаписывается и сохраняет refreshed_at: иначе любой
+-- пересчёт попадал бы в инкрементальное дочитывание индекса функции matching
+CREATE OR REPLACE FUNCTION refresh_matching_user_profiles(user_ids INTEGER[]) RETURNS void AS $$
+BEGIN
+    IF user_ids IS NULL OR cardinality(user_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO matching_user_profiles (user_id, skill_ids, levels, active, refreshed_at)
+    SELECT ids.id,
+           COALESCE((SELECT array_agg(us.skill_id ORDER BY us.skill_id) FROM user_skills us WHERE us.user_id = ids.id), '{}'),
+           COALESCE((SELECT array_agg(matching_level(us.proficiency_level) ORDER BY us.skill_id) FROM user_skills us WHERE us.user_id = ids.id), '{}'),
+           COALESCE(u.active AND u.role = 'jobseeker', false),
+           now()
+    FROM unnest(user_ids) AS ids(id)
+    LEFT JOIN users u ON u.id = ids.id
+    ON CONFLICT (user_id) DO UPDATE
+        SET skill_ids = EXCLUDED.skill_ids, levels = EXCLUDED.levels,
+            active = EXCLUDED.active, refreshed_at = EXCLUDED.refreshed_at
+        WHERE (matching_user_profiles.skill_ids, matching_user_profiles.levels, matching_user_profiles.active)
+              IS DISTINCT FROM (EXCLUDED.skill_ids, EXCLUDED.levels, EXCLUDED.active);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION refresh_matching_job_profiles(job_ids INTEGER[]) RETURNS void AS $$
+BEGIN
+    IF job_ids IS NULL OR cardinality(job_ids) = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO matching_job_profiles (job_id, skill_ids, required, active, refreshed_at)
+    SELECT ids.id,
+           COALESCE((SELECT array_agg(js.skill_id ORDER BY js.skill_id) FROM job_skills js WHERE js.job_id = ids.id), '{}'),
+           COALESCE((SELECT array_agg(COALESCE(js.required, true) ORDER BY js.skill_id) FROM job_skills js WHERE js.job_id = ids.id), '{}'),
+           COALESCE(j.status = 'active', false),
+           now()
+    FROM unnest(job_ids) AS ids(id)
+    LEFT JOIN jobs j ON j.id = ids.id
+    ON CONFLICT (job_id) DO UPDATE
+        SET skill_ids = EXCLUDED.skill_ids, required = EXCLUDED.required,
+            active = EXCLUDED.active, refreshed_at = EXCLUDED.refreshed_at
+        WHERE (matching_job_profiles.skill_ids, matching_job_profiles.required, matching_job_profiles.active)
+              IS DISTINCT FROM (EXCLUDED.skill_ids, EXCLUDED.required, EXCLUDED.active);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Триггеры уровня оператора: один пересчёт профилей на оператор
+CREATE OR REPLACE FUNCTION matching_user_skills_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM refresh_matching_user_profiles(ARRAY(SELECT DISTINCT user_id FROM old_rows));
+    ELSE
+        PERFORM refresh_matching_user_profiles(ARRAY(SELECT DISTINCT user_id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION matching_job_skills_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM refresh_matching_job_profiles(ARRAY(SELECT DISTINCT job_id FROM old_rows));
+    ELSE
+        PERFORM refresh_matching_job_profiles(ARRAY(SELECT DISTINCT job_id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION matching_owner_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        PERFORM refresh_matching_user_profiles(ARRAY(SELECT id FROM new_rows));
+    ELSE
+        PERFORM refresh_matching_job_profiles(ARRAY(SELECT id FROM new_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Обновление пользователей и вакансий: профиль пересчитывается только при смене роли
+-- или активности пользователя и статуса вакансии. Сброс счётчиков просмотров и откликов
+-- и смена updated_at профили не затрагивают
+CREATE OR REPLACE FUNCTION matching_owner_updated() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        PERFORM refresh_matching_user_profiles(ARRAY(
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (o.role, o.active) IS DISTINCT FROM (n.role, n.active)
+        ));
+    ELSE
+        PERFORM refresh_matching_job_profiles(ARRAY(
+            SELECT n.id FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE o.status IS DISTINCT FROM n.status
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    op TEXT;
+    link RECORD;
+BEGIN
+    FOR link IN SELECT * FROM (VALUES
+        ('user_skills', 'matching_user_skills_changed'),
+        ('job_skills', 'matching_job_skills_changed')
+    ) AS l(link_table, trigger_function)
+    LOOP
+        FOREACH op IN ARRAY ARRAY['insert', 'update', 'delete']
+        LOOP
+            EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_matching_%s ON %I', link.link_table, op, link.link_table);
+            EXECUTE format(
+                'CREATE TRIGGER trg_%s_matching_%s AFTER %s ON %I
+                     REFERENCING %s TABLE AS %s
+                     FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+                link.link_table, op, upper(op), link.link_table,
+                CASE op WHEN 'delete' THEN 'OLD' ELSE 'NEW' END,
+                CASE op WHEN 'delete' THEN 'old_rows' ELSE 'new_rows' END,
+                link.trigger_function
+            );
+        END LOOP;
+    END LOOP;
+
+    -- Новые пользователи и вакансии, смена роли/активности пользователя и статуса вакансии
+    FOREACH op IN ARRAY ARRAY['users', 'jobs']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_matching_insert ON %I', op, op);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_matching_insert AFTER INSERT ON %I
+                 REFERENCING NEW TABLE AS new_rows
+                 FOR EACH STATEMENT EXECUTE FUNCTION matching_owner_changed()',
+            op, op
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_matching_update ON %I', op, op);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_matching_update AFTER UPDATE ON %I
+                 REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                 FOR EACH STATEMENT EXECUTE FUNCTION matching_owner_updated()',
+            op, op
+        );
+    END LOOP;
+END;
+$$;
+
+-- Первичное заполнение
+SELECT refresh_matching_user_profiles(ARRAY(SELECT id FROM users));
+SELECT refresh_matching_job_profiles(ARRAY(SELECT id FROM jobs));
@@ -0,0 +1,17 @@
+-- Транзакционный outbox событий по откликам: событие пишется тем же оператором, что и смена
+-- статуса, а рассылку уведомлений выполняет задача maintenance пакетами, вне запроса
+CREATE TABLE IF NOT EXISTS application_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    application_id INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    jobseeker_id INTEGER NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+
+-- Очередь выбирается по available_at в порядке id
+CREATE INDEX IF NOT EXISTS idx_application_outbox_available ON application_outbox(available_at, id);